@@ -1,6 +1,7 @@
-from typing import Generator, Optional, Annotated
+import hashlib
+from typing import AsyncGenerator, Generator, Optional, Annotated
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
@@ -10,18 +11,22 @@ import crud, schemas
 from db import models
 from core import security
 from core.config import settings
-from db.base import get_session
+from db.base import get_session, read_session_factory
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login"
 )
 
+READ_PIN_HEADER = "X-Read-Your-Writes"
+
 async def get_current_user(
+    request: Request,
     db: Annotated[AsyncSession, Depends(get_session)],
     token: Annotated[str, Depends(reusable_oauth2)]
 ) -> models.User:
     """
     Dependency to get the current user from the JWT token.
+    The user is looked up by the token's `uid` claim through the identity cache.
     Raises HTTPException if token is invalid or user not found.
     """
     credentials_exception = HTTPException(
@@ -39,12 +44,41 @@ async def get_current_user(
     except (JWTError, ValidationError):
         raise credentials_exception
 
-    user = await crud.user.get_by_email(db, email=token_data.sub)
+    if token_data.uid is not None:
+        user = await crud.user.get_cached(db, id=token_data.uid)
+        # The subject must still match, e.g. after an email change
+        if user is not None and user.email != token_data.sub:
+            user = None
+    else:
+        # Tokens issued before the uid claim existed
+        user = await crud.user.get_by_email(db, email=token_data.sub)
 
     if user is None:
         raise credentials_exception
+    # Commits on this request's session pin the user's reads to the primary;
+    # main.read_your_writes_header hands the pin to the client as a token
+    db.info["user_id"] = user.id
+    request.state.primary_session_info = db.info
     return user
 
+def has_read_pin(read_pin: Optional[str], user_id: int) -> bool:
+    """Whether an X-Read-Your-Writes token is valid for `user_id`."""
+    return read_pin is not None and security.read_pin_user_id(read_pin) == user_id
+
+async def get_read_session(
+    current_user: Annotated[models.User, Depends(get_current_user)],
+    read_pin: Annotated[Optional[str], Header(alias=READ_PIN_HEADER, include_in_schema=False)] = None,
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for read-only endpoints: a session on one of the read replicas,
+    or on the primary if there are none or the user wrote within the last
+    DB_READ_YOUR_WRITES_SECONDS, as shown by the X-Read-Your-Writes token from
+    that write's response (whichever worker took it). Never commit through it.
+    """
+    pinned = has_read_pin(read_pin, current_user.id)
+    async with read_session_factory(user_id=current_user.id, pinned=pinned)() as session:
+        yield session
+
 async def get_current_active_user(
     current_user: Annotated[models.User, Depends(get_current_user)]
 ) -> models.User:
@@ -55,3 +89,36 @@ async def get_current_active_user(
     if not current_user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
     return current_user
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque_tag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque_tag for candidate in if_none_match.split(","))
+
+async def check_not_modified(
+    request: Request,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_read_session)],
+    current_user: Annotated[models.User, Depends(get_current_active_user)],
+) -> None:
+    """
+    Dependency for list endpoints that only change through account/transaction writes.
+    Derives a weak ETag from the user's data version, the path and the query string,
+    and answers 304 Not Modified when If-None-Match carries it, before the endpoint
+    runs any query of its own. Otherwise the ETag is set on the response.
+    The version is read on the endpoint's own session, so it is never newer than the
+    data served with it. Inactive users are refused before any ETag check.
+    """
+    data_version = await crud.user.get_data_version(db, id=current_user.id)
+    if data_version is None:
+        return
+    variant = hashlib.sha256(f"{request.url.path}?{request.url.query}".encode()).hexdigest()[:16]
+    etag = f'W/"{current_user.id}-{data_version}-{variant}"'
+    # Browsers must revalidate, and shared caches must not store per-user lists
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
@@ -1,15 +1,21 @@
 from typing import List, Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import crud, schemas
 from db import models
 from api.v1 import deps
+from core.config import settings
+from core.responses import rows_response
 from db.base import get_session
 
 router = APIRouter()
 
+# Prebuilt validator/serializer for the FAST_LIST_SERIALIZATION path of the listing
+ACCOUNT_LIST_ADAPTER = TypeAdapter(List[schemas.Account])
+
 @router.post("/", response_model=schemas.Account, status_code=status.HTTP_201_CREATED)
 async def create_account(
     *,
@@ -26,26 +32,30 @@ async def create_account(
     )
     return account
 
-@router.get("/", response_model=List[schemas.Account])
+@router.get("/", response_model=List[schemas.Account], dependencies=[Depends(deps.check_not_modified)])
 async def read_accounts(
     *,
-    db: Annotated[AsyncSession, Depends(get_session)],
+    response: Response,
+    db: Annotated[AsyncSession, Depends(deps.get_read_session)],
     skip: int = 0,
     limit: int = 100,
     current_user: Annotated[models.User, Depends(deps.get_current_active_user)]
 ):
     """
     Retrieve all financial accounts for the current user.
+    Responses carry an ETag; a matching If-None-Match gets 304 Not Modified.
     """
     accounts = await crud.account.get_multi_by_owner(
-        db=db, owner_id=current_user.id, skip=skip, limit=limit
+        db=db, owner_id=current_user.id, skip=skip, limit=limit, as_rows=settings.FAST_LIST_SERIALIZATION
     )
+    if settings.FAST_LIST_SERIALIZATION:
+        return rows_response(ACCOUNT_LIST_ADAPTER, [row._mapping for row in accounts], headers=dict(response.headers))
     return accounts
 
 @router.get("/{account_id}", response_model=schemas.Account)
 async def read_account(
     *,
-    db: Annotated[AsyncSession, Depends(get_session)],
+    db: Annotated[AsyncSession, Depends(deps.get_read_session)],
     account_id: int,
     current_user: Annotated[models.User, Depends(deps.get_current_active_user)]
 ):
@@ -57,6 +67,40 @@ async def read_account(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Account not found")
     return account
 
+@router.get("/{account_id}/reconcile", response_model=schemas.AccountReconciliation)
+async def reconcile_account(
+    *,
+    db: Annotated[AsyncSession, Depends(deps.get_read_session)],
+    account_id: int,
+    current_user: Annotated[models.User, Depends(deps.get_current_active_user)]
+):
+    """
+    Check an account balance against its monthly ledger.
+    Only the most recent ledger month is recomputed from transactions.
+    """
+    account = await crud.account.get_by_owner(db=db, id=account_id, owner_id=current_user.id)
+    if not account:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Account not found")
+    return await crud.ledger.reconcile(db, account=account)
+
+@router.post("/{account_id}/reconcile", response_model=schemas.AccountReconciliation)
+async def rebuild_account_ledger(
+    *,
+    db: Annotated[AsyncSession, Depends(get_session)],
+    account_id: int,
+    current_user: Annotated[models.User, Depends(deps.get_current_active_user)]
+):
+    """
+    Rebuild an account's ledger from its full transaction history, then reconcile it.
+    Needed once for accounts created before the ledger existed.
+    """
+    account = await crud.account.get_by_owner(db=db, id=account_id, owner_id=current_user.id)
+    if not account:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Account not found")
+    await crud.ledger.rebuild(db, account=account)
+    await db.commit()
+    return await crud.ledger.reconcile(db, account=account)
+
 @router.put("/{account_id}", response_model=schemas.Account)
 async def update_account(
     *,
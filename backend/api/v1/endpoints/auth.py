@@ -34,8 +34,8 @@ async def login(
     elif not user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
 
-    access_token = security.create_access_token(user.email) # Use email as subject
-    refresh_token = security.create_refresh_token(user.email)
+    access_token = security.create_access_token(user.email, user_id=user.id) # Use email as subject
+    refresh_token = security.create_refresh_token(user.email, user_id=user.id)
     return {
         "access_token": access_token,
         "refresh_token": refresh_token,
@@ -96,8 +96,8 @@ async def refresh_access_token(
     if user is None or not user.is_active:
         raise credentials_exception
 
-    new_access_token = security.create_access_token(user.email)
-    new_refresh_token = security.create_refresh_token(user.email)
+    new_access_token = security.create_access_token(user.email, user_id=user.id)
+    new_refresh_token = security.create_refresh_token(user.email, user_id=user.id)
 
     return {
         "access_token": new_access_token,
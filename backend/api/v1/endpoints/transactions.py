@@ -1,34 +1,145 @@
+import csv
+import io
+import json
 import logging
-from typing import List, Annotated, Optional
-from datetime import datetime
+from typing import Any, AsyncIterator, List, Annotated, Optional
+from datetime import date, datetime
+from decimal import Decimal
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Body, Header, Response, File, Form, UploadFile
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import crud, schemas
+from crud import crud_transaction
+from crud.crud_account import AccountNotFound
 from db import models
 from api.v1 import deps
-from db.base import get_session
-from services import nlp_parser
+from core.config import settings
+from core.responses import rows_response
+from db.base import get_session, read_session_factory
+from services import nlp_parser, ollama, rule_parser, csv_import
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Prebuilt validator/serializer for the FAST_LIST_SERIALIZATION path of the listing
+TRANSACTION_LIST_ADAPTER = TypeAdapter(List[schemas.Transaction])
+
+EXPORT_HEADER = [column.key for column in crud_transaction.EXPORT_COLUMNS]
+EXPORT_MEDIA_TYPES = {
+    schemas.ExportFormat.CSV: "text/csv",
+    schemas.ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+def _export_value(value):
+    """Convert a column value into something csv/json can write."""
+    if isinstance(value, Decimal):
+        # Two-decimal amounts round-trip exactly through float's shortest repr
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, schemas.TransactionType):
+        return value.value
+    return value
+
+async def _export_chunks(export_format: schemas.ExportFormat, *, pinned: bool, **filters) -> AsyncIterator[str]:
+    """
+    Render the owner's transactions chunk by chunk in the requested format.
+    Opens its own read session because the request-scoped one is closed before
+    the response body is streamed.
+    """
+    async with read_session_factory(user_id=filters["owner_id"], pinned=pinned)() as db:
+        if export_format == schemas.ExportFormat.CSV:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_HEADER)
+            async for rows in crud.transaction.stream_by_owner(db=db, **filters):
+                writer.writerows([_export_value(value) for value in row] for row in rows)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            async for rows in crud.transaction.stream_by_owner(db=db, **filters):
+                yield "".join(
+                    json.dumps(dict(zip(EXPORT_HEADER, map(_export_value, row)))) + "\n"
+                    for row in rows
+                )
+
+IdempotencyKeyHeader = Annotated[
+    Optional[str],
+    Header(alias="Idempotency-Key", max_length=255, description="Client-chosen key that makes retries of this request safe"),
+]
+
+def _replay_idempotent_response(stored: dict, request_hash: str) -> JSONResponse:
+    """The stored response for a reused Idempotency-Key, unless the request itself differs."""
+    if stored["request_hash"] != request_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="This Idempotency-Key was already used for a different request.",
+        )
+    return JSONResponse(
+        status_code=stored["status_code"],
+        content=stored["response"],
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+async def _save_idempotent_response(
+    db: AsyncSession, *, owner_id: int, key: str, request_hash: str, body: Any
+) -> Optional[JSONResponse]:
+    """
+    Store a 201 response for the key in the pending write's transaction. If a
+    concurrent request with the same key won, roll this write back and return
+    that request's response instead.
+    """
+    saved = await crud.idempotency.save_response(
+        db, owner_id=owner_id, key=key, request_hash=request_hash,
+        status_code=status.HTTP_201_CREATED, response=body,
+    )
+    if saved:
+        return None
+    await db.rollback()
+    logger.info(f"Idempotency-Key {key} of user {owner_id} was committed concurrently; replaying it")
+    stored = await crud.idempotency.get_response(db, owner_id=owner_id, key=key)
+    if stored is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A request with this Idempotency-Key is still being processed.")
+    return _replay_idempotent_response(stored, request_hash)
+
 @router.post("/parse", response_model=list[schemas.NlpParsedTransaction])
 async def parse_natural_language_transaction(
     nlp_input: schemas.NlpInput,
+    response: Response,
     current_user: Annotated[models.User, Depends(deps.get_current_active_user)],
 ) -> list[schemas.NlpParsedTransaction]:
     """
-    Takes natural language text and returns structured transaction data using LLM.
+    Takes natural language text and returns structured transaction data.
+    Simple inputs are handled by the rule-based parser; everything else goes to the LLM.
+    The `X-Parse-Source` response header says which one was used (`rules` or `llm`).
 
     This endpoint **does not** save the transaction. It's intended for the frontend
     to display the parsed result for user confirmation or editing before calling
     the `POST /transactions/` endpoint.
     """
     logger.info(f"User {current_user.email} parsing text: '{nlp_input.text}'")
-    parsed_data = await nlp_parser.parse_transaction_nlp(text=nlp_input.text)
+    parsed_data = None
+    if settings.NLP_RULE_PARSER_ENABLED:
+        parsed_data = rule_parser.parse_transaction_rules(nlp_input.text)
+    if parsed_data is not None:
+        response.headers["X-Parse-Source"] = "rules"
+    else:
+        try:
+            parsed_data = await nlp_parser.parse_transaction_nlp(text=nlp_input.text)
+        except ollama.OllamaOverloaded as e:
+            logger.warning(f"Rejected NLP parse for user {current_user.email}: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="The parsing service is busy. Please try again shortly.",
+                headers={"Retry-After": "5"},
+            )
+        response.headers["X-Parse-Source"] = "llm"
 
     if not parsed_data:
         logger.warning(f"NLP parsing failed for text: '{nlp_input.text}'")
@@ -41,32 +152,91 @@ async def parse_natural_language_transaction(
     return parsed_data
 
 
+@router.post("/parse/stream")
+async def parse_natural_language_transaction_stream(
+    nlp_input: schemas.NlpInput,
+    current_user: Annotated[models.User, Depends(deps.get_current_active_user)],
+):
+    """
+    Streaming variant of `POST /transactions/parse`.
+
+    Responds with NDJSON: one `NlpParsedTransaction` per line, sent as soon as the
+    model has finished writing it. If parsing fails midway or finds no transaction,
+    the last line is an object with an `error` key. The `X-Parse-Source` header works as in `/parse`.
+    """
+    logger.info(f"User {current_user.email} stream parsing text: '{nlp_input.text}'")
+    parsed_data = None
+    if settings.NLP_RULE_PARSER_ENABLED:
+        parsed_data = rule_parser.parse_transaction_rules(nlp_input.text)
+    if parsed_data is not None:
+        return StreamingResponse(
+            iter([transaction.model_dump_json() + "\n" for transaction in parsed_data]),
+            media_type="application/x-ndjson",
+            headers={"X-Parse-Source": "rules"},
+        )
+
+    if ollama.admission.is_full():
+        logger.warning(f"Rejected NLP stream parse for user {current_user.email}: queue full")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The parsing service is busy. Please try again shortly.",
+            headers={"Retry-After": "5"},
+        )
+
+    async def lines():
+        parsed_any = False
+        try:
+            async for transaction in nlp_parser.stream_transaction_nlp(text=nlp_input.text):
+                parsed_any = True
+                yield transaction.model_dump_json() + "\n"
+            if not parsed_any:
+                # Same outcome as the 400 from /parse when nothing valid comes back
+                logger.warning(f"NLP stream parsing found no transactions for user {current_user.email}")
+                yield json.dumps({"error": "Could not parse transaction details from the provided text."}) + "\n"
+        except ollama.OllamaOverloaded:
+            yield json.dumps({"error": "The parsing service is busy. Please try again shortly."}) + "\n"
+        except Exception as e:
+            logger.error(f"NLP stream parsing failed for user {current_user.email}: {e}", exc_info=True)
+            yield json.dumps({"error": "Could not parse transaction details from the provided text."}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers={"X-Parse-Source": "llm"})
+
+
 @router.post("/", response_model=schemas.Transaction, status_code=status.HTTP_201_CREATED)
 async def create_transaction(
     *,
     db: Annotated[AsyncSession, Depends(get_session)],
     transaction_in: schemas.TransactionCreate,
     current_user: Annotated[models.User, Depends(deps.get_current_active_user)],
+    idempotency_key: IdempotencyKeyHeader = None,
 ):
     """
     Creates a new transaction in the database after user confirmation/input.
     Atomically updates the associated account balance.
+
+    With an `Idempotency-Key` header, retries with the same key get the original
+    response back (with `Idempotent-Replayed: true`) instead of creating another
+    transaction.
     """
     logger.info(f"User {current_user.email} creating transaction for account {transaction_in.account_id}")
-    account = await crud.account.get_by_owner(db=db, id=transaction_in.account_id, owner_id=current_user.id)
-    if not account:
+    request_hash = None
+    if idempotency_key:
+        request_hash = crud.idempotency.request_hash("POST", "/transactions/", transaction_in)
+        stored = await crud.idempotency.get_response(db, owner_id=current_user.id, key=idempotency_key)
+        if stored is not None:
+            logger.info(f"Replaying transaction create for user {current_user.email} (Idempotency-Key {idempotency_key})")
+            return _replay_idempotent_response(stored, request_hash)
+
+    try:
+        transaction = await crud.transaction.create_with_owner(
+            db=db, obj_in=transaction_in, owner_id=current_user.id, commit=False
+        )
+    except AccountNotFound:
         logger.warning(f"User {current_user.email} attempted to create transaction for non-owned/non-existent account {transaction_in.account_id}")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Account not found or does not belong to the current user."
         )
-
-    try:
-        transaction = await crud.transaction.create_with_owner(
-            db=db, obj_in=transaction_in, owner_id=current_user.id
-        )
-        logger.info(f"Transaction {transaction.id} created successfully for user {current_user.email}")
-        return transaction
     except ValueError as e:
         logger.error(f"Error creating transaction for user {current_user.email}: {e}", exc_info=True)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -74,40 +244,241 @@ async def create_transaction(
         logger.error(f"Unexpected error creating transaction for user {current_user.email}: {e}", exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error creating transaction.")
 
+    if idempotency_key:
+        replay = await _save_idempotent_response(
+            db,
+            owner_id=current_user.id,
+            key=idempotency_key,
+            request_hash=request_hash,
+            body=schemas.Transaction.model_validate(transaction).model_dump(mode="json"),
+        )
+        if replay is not None:
+            return replay
+    await db.commit()
+    logger.info(f"Transaction {transaction.id} created successfully for user {current_user.email}")
+    return transaction
 
-@router.get("/", response_model=List[schemas.Transaction])
-async def read_transactions(
+
+@router.post("/bulk", response_model=List[schemas.Transaction], status_code=status.HTTP_201_CREATED)
+async def create_transactions_bulk(
+    *,
+    db: Annotated[AsyncSession, Depends(get_session)],
+    bulk_in: schemas.TransactionBulkCreate,
+    current_user: Annotated[models.User, Depends(deps.get_current_active_user)],
+    idempotency_key: IdempotencyKeyHeader = None,
+):
+    """
+    Creates several transactions at once, e.g. everything returned by `POST /transactions/parse`.
+    Either all transactions are saved or none are; each account balance is updated once.
+    Supports the `Idempotency-Key` header like `POST /transactions/`.
+    """
+    account_ids = {transaction_in.account_id for transaction_in in bulk_in.transactions}
+    logger.info(f"User {current_user.email} bulk creating {len(bulk_in.transactions)} transactions for accounts {sorted(account_ids)}")
+    request_hash = None
+    if idempotency_key:
+        request_hash = crud.idempotency.request_hash("POST", "/transactions/bulk", bulk_in)
+        stored = await crud.idempotency.get_response(db, owner_id=current_user.id, key=idempotency_key)
+        if stored is not None:
+            logger.info(f"Replaying bulk transaction create for user {current_user.email} (Idempotency-Key {idempotency_key})")
+            return _replay_idempotent_response(stored, request_hash)
+
+    try:
+        transactions = await crud.transaction.create_multi_with_owner(
+            db=db, objs_in=bulk_in.transactions, owner_id=current_user.id, commit=False
+        )
+    except AccountNotFound as e:
+        logger.warning(f"User {current_user.email} attempted bulk create for non-owned/non-existent accounts {e.account_ids}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error bulk creating transactions for user {current_user.email}: {e}", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error creating transactions.")
+
+    if idempotency_key:
+        replay = await _save_idempotent_response(
+            db,
+            owner_id=current_user.id,
+            key=idempotency_key,
+            request_hash=request_hash,
+            body=[schemas.Transaction.model_validate(transaction).model_dump(mode="json") for transaction in transactions],
+        )
+        if replay is not None:
+            return replay
+    await db.commit()
+    logger.info(f"{len(transactions)} transactions created successfully for user {current_user.email}")
+    return transactions
+
+
+@router.post("/import", response_model=schemas.TransactionImportResult, status_code=status.HTTP_201_CREATED)
+async def import_transactions(
+    *,
     db: Annotated[AsyncSession, Depends(get_session)],
+    account_id: Annotated[int, Form(description="ID of the account the statement belongs to")],
+    file: Annotated[UploadFile, File(description="CSV statement with date, amount and optional type, category, description columns")],
+    current_user: Annotated[models.User, Depends(deps.get_current_active_user)],
+):
+    """
+    Imports a bank statement CSV into one of the current user's accounts.
+    Invalid rows are skipped and reported; valid rows are saved and the account
+    balance is adjusted once for the whole file.
+    """
+    logger.info(f"User {current_user.email} importing '{file.filename}' into account {account_id}")
+    account = await crud.account.get_by_owner(db=db, id=account_id, owner_id=current_user.id)
+    if not account:
+        logger.warning(f"User {current_user.email} attempted import into non-owned/non-existent account {account_id}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Account not found or does not belong to the current user."
+        )
+
+    try:
+        result = await csv_import.import_transactions_csv(
+            db=db, upload=file, account_id=account_id, owner_id=current_user.id
+        )
+        logger.info(f"Import into account {account_id} finished for user {current_user.email}: {result.imported} imported, {result.failed} failed")
+        return result
+    except (UnicodeDecodeError, csv.Error) as e:
+        logger.warning(f"Unreadable CSV uploaded by user {current_user.email}: {e}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The uploaded file is not a readable UTF-8 CSV file.")
+    except Exception as e:
+        logger.error(f"Unexpected error importing transactions for user {current_user.email}: {e}", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error importing transactions.")
+
+
+@router.get("/", response_model=List[schemas.Transaction], dependencies=[Depends(deps.check_not_modified)])
+async def read_transactions(
+    response: Response,
+    db: Annotated[AsyncSession, Depends(deps.get_read_session)],
     current_user: Annotated[models.User, Depends(deps.get_current_active_user)],
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page; replaces skip"),
     account_id: Optional[int] = Query(None, description="Filter by account ID"),
     start_date: Optional[datetime] = Query(None, description="Filter by start date (YYYY-MM-DDTHH:MM:SS)"),
     end_date: Optional[datetime] = Query(None, description="Filter by end date (YYYY-MM-DDTHH:MM:SS)"),
-    category: Optional[str] = Query(None, description="Filter by category (case-insensitive, partial match)"),
+    category: Optional[str] = Query(None, description="Filter by category (case-insensitive; exact for known categories, partial match otherwise)"),
+    q: Optional[str] = Query(None, max_length=100, description="Search category and description (case-insensitive, partial match)"),
     transaction_type: Optional[schemas.TransactionType] = Query(None, alias="type", description="Filter by transaction type (INCOME or EXPENSE)"),
 ):
     """
     Retrieve transactions for the current user, with optional filtering.
+    When a full page is returned, the `X-Next-Cursor` response header carries the
+    cursor for the next page. Responses carry an ETag; a matching If-None-Match
+    gets 304 Not Modified without querying transactions.
     """
-    logger.info(f"User {current_user.email} reading transactions with filters: account={account_id}, start={start_date}, end={end_date}, cat={category}, type={transaction_type}")
-    transactions = await crud.transaction.get_multi_by_owner_and_account(
-        db=db,
+    logger.info(f"User {current_user.email} reading transactions with filters: account={account_id}, start={start_date}, end={end_date}, cat={category}, q={q}, type={transaction_type}, cursor={cursor}")
+    try:
+        transactions = await crud.transaction.get_multi_by_owner_and_account(
+            db=db,
+            owner_id=current_user.id,
+            account_id=account_id,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            start_date=start_date,
+            end_date=end_date,
+            category=category,
+            q=q,
+            transaction_type=transaction_type,
+            as_rows=settings.FAST_LIST_SERIALIZATION,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if transactions and len(transactions) == limit:
+        response.headers["X-Next-Cursor"] = crud_transaction.encode_cursor(transactions[-1])
+    if settings.FAST_LIST_SERIALIZATION:
+        return rows_response(TRANSACTION_LIST_ADAPTER, [row._mapping for row in transactions], headers=dict(response.headers))
+    return transactions
+
+@router.get("/export")
+async def export_transactions(
+    current_user: Annotated[models.User, Depends(deps.get_current_active_user)],
+    read_pin: Annotated[Optional[str], Header(alias=deps.READ_PIN_HEADER, include_in_schema=False)] = None,
+    export_format: schemas.ExportFormat = Query(schemas.ExportFormat.CSV, alias="format", description="Export format (csv or ndjson)"),
+    account_id: Optional[int] = Query(None, description="Filter by account ID"),
+    start_date: Optional[datetime] = Query(None, description="Filter by start date (YYYY-MM-DDTHH:MM:SS)"),
+    end_date: Optional[datetime] = Query(None, description="Filter by end date (YYYY-MM-DDTHH:MM:SS)"),
+    category: Optional[str] = Query(None, description="Filter by category (case-insensitive; exact for known categories, partial match otherwise)"),
+    q: Optional[str] = Query(None, max_length=100, description="Search category and description (case-insensitive, partial match)"),
+    transaction_type: Optional[schemas.TransactionType] = Query(None, alias="type", description="Filter by transaction type (INCOME or EXPENSE)"),
+):
+    """
+    Export the current user's full transaction history as CSV or NDJSON.
+    Accepts the same filters as `GET /transactions/` and streams the file in chunks.
+    """
+    logger.info(f"User {current_user.email} exporting transactions as {export_format.value}: account={account_id}, start={start_date}, end={end_date}, cat={category}, q={q}, type={transaction_type}")
+    chunks = _export_chunks(
+        export_format,
+        pinned=deps.has_read_pin(read_pin, current_user.id),
         owner_id=current_user.id,
         account_id=account_id,
-        skip=skip,
-        limit=limit,
         start_date=start_date,
         end_date=end_date,
         category=category,
+        q=q,
         transaction_type=transaction_type,
     )
-    return transactions
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="transactions.{export_format.value}"'},
+    )
+
+@router.get("/summary", response_model=List[schemas.TransactionSummaryBucket])
+async def read_transaction_summary(
+    db: Annotated[AsyncSession, Depends(deps.get_read_session)],
+    current_user: Annotated[models.User, Depends(deps.get_current_active_user)],
+    granularity: schemas.SummaryGranularity = Query(schemas.SummaryGranularity.DAY, description="Bucket size (day, week or month)"),
+    account_id: Optional[int] = Query(None, description="Filter by account ID"),
+    start_date: Optional[datetime] = Query(None, description="Filter by start date (YYYY-MM-DDTHH:MM:SS)"),
+    end_date: Optional[datetime] = Query(None, description="Filter by end date (YYYY-MM-DDTHH:MM:SS)"),
+    transaction_type: Optional[schemas.TransactionType] = Query(None, alias="type", description="Filter by transaction type (INCOME or EXPENSE)"),
+):
+    """
+    Retrieve per-period totals for the current user, grouped by type and category.
+    Intended for dashboard charts so they don't have to download and sum raw transactions.
+    """
+    logger.info(f"User {current_user.email} reading transaction summary: granularity={granularity}, account={account_id}, start={start_date}, end={end_date}, type={transaction_type}")
+    buckets = await crud.transaction.get_summary_by_owner(
+        db=db,
+        owner_id=current_user.id,
+        granularity=granularity,
+        account_id=account_id,
+        start_date=start_date,
+        end_date=end_date,
+        transaction_type=transaction_type,
+    )
+    return buckets
+
+@router.get("/rollups/monthly", response_model=List[schemas.TransactionMonthlyRollup])
+async def read_monthly_rollups(
+    db: Annotated[AsyncSession, Depends(deps.get_read_session)],
+    current_user: Annotated[models.User, Depends(deps.get_current_active_user)],
+    start_month: Optional[date] = Query(None, description="First month to include (any day of it, YYYY-MM-DD)"),
+    end_month: Optional[date] = Query(None, description="Last month to include (any day of it, YYYY-MM-DD)"),
+    account_id: Optional[int] = Query(None, description="Filter by account ID"),
+    transaction_type: Optional[schemas.TransactionType] = Query(None, alias="type", description="Filter by transaction type (INCOME or EXPENSE)"),
+):
+    """
+    Retrieve monthly totals by type and category for the current user (UTC months).
+    Served from precomputed rollups, so month-over-month and yearly views don't
+    scan raw transactions.
+    """
+    logger.info(f"User {current_user.email} reading monthly rollups: start={start_month}, end={end_month}, account={account_id}, type={transaction_type}")
+    rollups = await crud.rollup.get_by_owner(
+        db=db,
+        owner_id=current_user.id,
+        start_month=start_month,
+        end_month=end_month,
+        account_id=account_id,
+        transaction_type=transaction_type,
+    )
+    return rollups
 
 @router.get("/{transaction_id}", response_model=schemas.Transaction)
 async def read_transaction(
     *,
-    db: Annotated[AsyncSession, Depends(get_session)],
+    db: Annotated[AsyncSession, Depends(deps.get_read_session)],
     transaction_id: int,
     current_user: Annotated[models.User, Depends(deps.get_current_active_user)],
 ):
@@ -140,15 +511,6 @@ async def update_transaction(
         logger.warning(f"User {current_user.email} failed to find transaction {transaction_id} for update")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found")
 
-    if transaction_in.account_id is not None and transaction_in.account_id != db_transaction.account_id:
-        new_account = await crud.account.get_by_owner(db=db, id=transaction_in.account_id, owner_id=current_user.id)
-        if not new_account:
-             logger.warning(f"User {current_user.email} attempted update transaction {transaction_id} to non-owned/non-existent account {transaction_in.account_id}")
-             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="New target account not found or does not belong to the current user."
-            )
-
     try:
         updated_transaction = await crud.transaction.update_transaction_and_balance(
             db=db, db_obj=db_transaction, obj_in=transaction_in
@@ -156,6 +518,12 @@ async def update_transaction(
 
         logger.info(f"Transaction {transaction_id} updated successfully for user {current_user.email}")
         return updated_transaction
+    except AccountNotFound:
+        logger.warning(f"User {current_user.email} attempted update transaction {transaction_id} to non-owned/non-existent account {transaction_in.account_id}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="New target account not found or does not belong to the current user."
+        )
     except ValueError as e:
         logger.error(f"Error updating transaction {transaction_id} for user {current_user.email}: {e}", exc_info=True)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -0,0 +1,85 @@
+"""
+Per-row cost of serializing a GET /transactions/ page, before and after
+FAST_LIST_SERIALIZATION. Needs no database:
+
+    python benchmarks/list_serialization.py [--rows 1000] [--repeat 20]
+
+"default" mirrors FastAPI's path for ORM results: validate each Transaction
+with from_attributes, dump_python(mode="json"), render with JSONResponse.
+"fast" is core.responses.rows_response: validate column mappings with a
+prebuilt TypeAdapter and render with FastJSONResponse (orjson if installed).
+
+With orjson, 1000 rows: about 12 us/row default vs 6 us/row fast (~2x).
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+import schemas
+from core import responses
+from db.models import Transaction, TransactionTypeEnum
+
+ADAPTER = TypeAdapter(List[schemas.Transaction])
+
+
+def make_rows(count: int) -> List[dict]:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": i,
+            "amount": Decimal(i % 5000) + Decimal("0.99"),
+            "type": TransactionTypeEnum.EXPENSE if i % 3 else TransactionTypeEnum.INCOME,
+            "category": "Groceries",
+            "date": now - timedelta(hours=i),
+            "description": f"Card payment {i}",
+            "account_id": 1 + i % 4,
+            "owner_id": 1,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(count)
+    ]
+
+
+def default_path(objects: List[Transaction]) -> bytes:
+    # What FastAPI does for a response_model: validate, serialize_response's
+    # dump_python(mode="json"), then JSONResponse.render
+    items = ADAPTER.validate_python(objects, from_attributes=True)
+    return JSONResponse(ADAPTER.dump_python(items, mode="json")).body
+
+
+def fast_path(rows: List[dict]) -> bytes:
+    return responses.rows_response(ADAPTER, rows).body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    objects = [Transaction(**row) for row in rows]
+    assert json.loads(default_path(objects)) == json.loads(fast_path(rows))
+
+    print(f"{args.rows} rows, best of {args.repeat}, encoder: {'orjson' if responses.orjson else 'json'}")
+    results = {}
+    for name, run in (("default", lambda: default_path(objects)), ("fast", lambda: fast_path(rows))):
+        best = min(timeit.repeat(run, number=1, repeat=args.repeat))
+        results[name] = best
+        print(f"  {name:<8} {best * 1e3:8.2f} ms/page  {best / args.rows * 1e6:7.2f} us/row")
+    print(f"  speedup  {results['default'] / results['fast']:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
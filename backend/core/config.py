@@ -14,10 +14,51 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    BCRYPT_ROUNDS: int = 12 # Changing it rehashes passwords on the next successful login
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 64 # Pending hash operations before logins/registrations get 503
+
+    USER_CACHE_TTL_SECONDS: int = 30 # Upper bound on how stale an authenticated user (e.g. is_active) can be
+    USER_CACHE_MAX_ENTRIES: int = 10_000
+
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24 # How long a stored response is replayed for its Idempotency-Key
+    IDEMPOTENCY_CACHE_TTL_SECONDS: int = 300 # In-process cache of recently replayed responses
+    IDEMPOTENCY_CACHE_MAX_ENTRIES: int = 10_000
+
     DATABASE_URL: str
+    DB_REQUIRE_CURRENT_REVISION: bool = True # Refuse to start on an unmigrated schema; False only logs a warning
+    DB_ECHO: bool = False # Logs every statement; for local debugging only
+    DB_POOL_SIZE: int = 10 # Per worker process
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0 # Seconds to wait for a free connection before failing the request
+    DB_POOL_RECYCLE: int = 1800 # Seconds; replace connections before server/proxy idle timeouts do
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100 # Prepared statements per connection; 0 behind PgBouncer in transaction mode
+    DATABASE_REPLICA_URLS: str = "" # Comma-separated read replica URLs; empty sends reads to the primary
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0 # How long a user's reads stay on the primary after they write
+    DB_PARTITION_MONTHS_AHEAD: int = 3 # Future monthly transaction partitions ensured at startup (partitioned databases only); <0 disables
 
     OLLAMA_API_URL: AnyHttpUrl
     OLLAMA_MODEL: str = "granite3.2"
+    OLLAMA_CONNECT_TIMEOUT: float = 5.0
+    OLLAMA_READ_TIMEOUT: float = 120.0
+    OLLAMA_MAX_CONNECTIONS: int = 10
+    OLLAMA_MAX_IN_FLIGHT: int = 2 # Concurrent generations sent to Ollama
+    OLLAMA_MAX_QUEUE: int = 16 # Parse requests allowed to wait for a slot before getting 503
+
+    NLP_RULE_PARSER_ENABLED: bool = True
+
+    NLP_BATCH_WINDOW_MS: int = 30 # How long to collect concurrent parses into one LLM call; 0 disables
+    NLP_BATCH_MAX_SIZE: int = 8
+
+    NLP_CACHE_BACKEND: str = "memory" # "memory", "sqlite" or "none"
+    NLP_CACHE_TTL_SECONDS: int = 24 * 60 * 60
+    NLP_CACHE_MAX_ENTRIES: int = 10_000
+    NLP_CACHE_SQLITE_PATH: str = "nlp_cache.sqlite3"
+
+    FAST_LIST_SERIALIZATION: bool = False # List endpoints select plain rows and render them with orjson
+
+    METRICS_TOKEN: str | None = None # Bearer token for /metrics; unset disables the endpoint
 
     CLIENT_ORIGIN: str | None = None
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
@@ -1,42 +1,123 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Union
+from typing import Any, Callable, TypeVar, Union
 
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 
 from .config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes made with any other cost are flagged by needs_update and rehashed on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+# bcrypt releases the GIL while hashing, so a thread pool keeps the event loop free
+_hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_hash_pending = 0
+_hash_stats = {
+    "operations": 0,
+    "rejected": 0,
+    "queue_wait_seconds_total": 0.0,
+    "queue_wait_seconds_max": 0.0,
+    "hash_seconds_total": 0.0,
+    "hash_seconds_max": 0.0,
+}
+
+T = TypeVar("T")
+
+class PasswordHasherBusy(Exception):
+    """Raised when more password hash operations are pending than PASSWORD_HASH_MAX_QUEUE."""
 
 ALGORITHM = "HS256"
 
-def create_access_token(subject: Union[str, Any], expires_delta: timedelta | None = None) -> str:
-    """Creates a JWT access token."""
+def create_access_token(subject: Union[str, Any], expires_delta: timedelta | None = None, user_id: int | None = None) -> str:
+    """Creates a JWT access token. `user_id`, when given, is stored in the `uid` claim."""
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode = {"exp": expire, "sub": str(subject)}
+    if user_id is not None:
+        to_encode["uid"] = user_id
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def create_refresh_token(subject: Union[str, Any], expires_delta: timedelta | None = None) -> str:
-    """Creates a JWT refresh token."""
+def create_refresh_token(subject: Union[str, Any], expires_delta: timedelta | None = None, user_id: int | None = None) -> str:
+    """Creates a JWT refresh token. `user_id`, when given, is stored in the `uid` claim."""
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     to_encode = {"exp": expire, "sub": str(subject)}
+    if user_id is not None:
+        to_encode["uid"] = user_id
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verifies a plain password against a hashed password."""
-    return pwd_context.verify(plain_password, hashed_password)
+def create_read_pin_token(user_id: int, expires_delta: timedelta) -> str:
+    """
+    Creates the short-lived token that pins a user's reads to the primary after a
+    write. It has no `sub` claim, so it is never accepted as an access token.
+    """
+    expire = datetime.now(timezone.utc) + expires_delta
+    to_encode = {"exp": expire, "uid": user_id, "type": "read_pin"}
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
+
+def read_pin_user_id(token: str) -> int | None:
+    """The user id of an unexpired read pin token, or None."""
+    payload = decode_token(token)
+    if payload is None or payload.get("type") != "read_pin" or not isinstance(payload.get("uid"), int):
+        return None
+    return payload["uid"]
+
+async def _run_hash_operation(func: Callable[..., T], *args: Any) -> T:
+    """Run a bcrypt operation on the hashing pool, recording queue wait and hash time."""
+    global _hash_pending
+    if _hash_pending >= settings.PASSWORD_HASH_MAX_QUEUE:
+        _hash_stats["rejected"] += 1
+        raise PasswordHasherBusy("Too many password hash operations pending.")
 
-def get_password_hash(password: str) -> str:
+    def timed() -> tuple[T, float, float]:
+        started = time.perf_counter()
+        result = func(*args)
+        return result, started, time.perf_counter()
+
+    _hash_pending += 1
+    submitted = time.perf_counter()
+    try:
+        result, started, finished = await asyncio.get_running_loop().run_in_executor(_hash_executor, timed)
+    finally:
+        _hash_pending -= 1
+
+    queue_wait, hash_time = started - submitted, finished - started
+    _hash_stats["operations"] += 1
+    _hash_stats["queue_wait_seconds_total"] += queue_wait
+    _hash_stats["queue_wait_seconds_max"] = max(_hash_stats["queue_wait_seconds_max"], queue_wait)
+    _hash_stats["hash_seconds_total"] += hash_time
+    _hash_stats["hash_seconds_max"] = max(_hash_stats["hash_seconds_max"], hash_time)
+    return result
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Verifies a password and, if the stored hash uses an outdated cost,
+    also returns a fresh hash to store (otherwise None).
+    """
+    return await _run_hash_operation(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash(password: str) -> str:
     """Hashes a plain password."""
-    return pwd_context.hash(password)
+    return await _run_hash_operation(pwd_context.hash, password)
+
+def hash_stats() -> dict:
+    """Counters for the password hashing pool."""
+    return {**_hash_stats, "pending": _hash_pending}
 
 def decode_token(token: str) -> dict | None:
     """Decodes a JWT token."""
@@ -1,3 +1,6 @@
 from .crud_user import user
 from .crud_account import account
 from .crud_transaction import transaction
+from .crud_ledger import ledger
+from .crud_rollup import rollup
+from .crud_idempotency import idempotency
@@ -1,8 +1,7 @@
 from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
 
-from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import select, insert, update as sqlalchemy_update, inspect as sqlalchemy_inspect
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db.base_class import Base
@@ -14,6 +13,11 @@ UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """
     Base class for CRUD operations on a SQLAlchemy model.
+
+    Writes are single `INSERT/UPDATE ... RETURNING` statements that hand back
+    the full row, server defaults included, so no refresh SELECT follows them.
+    They commit by default; pass `commit=False` to combine several writes in one
+    unit of work and commit once at the end.
     """
     def __init__(self, model: Type[ModelType]):
         """
@@ -24,6 +28,12 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         * `model`: A SQLAlchemy model class
         """
         self.model = model
+        # Mapped column attribute names, read once from the mapper
+        self.column_keys = frozenset(attr.key for attr in sqlalchemy_inspect(model).column_attrs)
+
+    def _column_values(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Keep only the entries of `data` that are columns of the model."""
+        return {key: value for key, value in data.items() if key in self.column_keys}
 
     async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
         """Get a single record by ID."""
@@ -41,13 +51,21 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         )
         return result.scalars().all()
 
-    async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+    async def create(
+        self,
+        db: AsyncSession,
+        *,
+        obj_in: Union[CreateSchemaType, Dict[str, Any]],
+        commit: bool = True
+    ) -> ModelType:
         """Create a new record."""
-        obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data)
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
+        obj_in_data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump()
+        result = await db.scalars(
+            insert(self.model).values(**self._column_values(obj_in_data)).returning(self.model)
+        )
+        db_obj = result.one()
+        if commit:
+            await db.commit()
         return db_obj
 
     async def update(
@@ -55,26 +73,35 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db: AsyncSession,
         *,
         db_obj: ModelType,
-        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+        commit: bool = True
     ) -> ModelType:
         """Update an existing record."""
-        obj_data = jsonable_encoder(db_obj)
-        if isinstance(obj_in, dict):
-            update_data = obj_in
-        else:
-            update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
+        update_data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=True)
+        values = self._column_values(update_data)
+        if values:
+            result = await db.scalars(
+                sqlalchemy_update(self.model)
+                .where(self.model.id == db_obj.id)
+                .values(**values)
+                .returning(self.model)
+                .execution_options(populate_existing=True, synchronize_session=False)
+            )
+            db_obj = result.one()
+        if commit:
+            await db.commit()
         return db_obj
 
-    async def remove(self, db: AsyncSession, *, id: int) -> Optional[ModelType]:
-        """Remove a record by ID."""
+    async def remove(self, db: AsyncSession, *, id: int, commit: bool = True) -> Optional[ModelType]:
+        """
+        Remove a record by ID. Goes through the ORM (load, then delete) so
+        relationship cascades configured on the model still apply.
+        """
         obj = await self.get(db=db, id=id)
         if obj:
             await db.delete(obj)
-            await db.commit()
+            if commit:
+                await db.commit()
+            else:
+                await db.flush()
         return obj
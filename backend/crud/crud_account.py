@@ -1,41 +1,90 @@
-from typing import List, Optional
-from sqlalchemy import select, update as sqlalchemy_update, delete as sqlalchemy_delete
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Union
+from sqlalchemy import select, bindparam, column, values, Integer, Row, update as sqlalchemy_update, delete as sqlalchemy_delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from crud.base import CRUDBase
+from crud.crud_ledger import ledger as crud_ledger
+from crud.crud_user import user as crud_user
 from db.models import Account
 from schemas.account import AccountCreate, AccountUpdate
 
+class AccountNotFound(Exception):
+    """Raised when a write targets accounts that don't exist or belong to someone else."""
+    def __init__(self, account_ids: Iterable[int]):
+        self.account_ids = sorted(account_ids)
+        super().__init__(f"Accounts not found or not owned by the current user: {self.account_ids}")
+
 class CRUDAccount(CRUDBase[Account, AccountCreate, AccountUpdate]):
     """CRUD operations for Account model."""
 
     async def create_with_owner(
-        self, db: AsyncSession, *, obj_in: AccountCreate, owner_id: int
+        self, db: AsyncSession, *, obj_in: AccountCreate, owner_id: int, commit: bool = True
     ) -> Account:
-        """Create a new account linked to an owner."""
+        """Create a new account linked to an owner, recording its opening balance in the ledger."""
+        db_obj = await self.create(db, obj_in={**obj_in.model_dump(), "owner_id": owner_id}, commit=False)
+        await crud_ledger.record_adjustment(db, account_id=db_obj.id, amount=db_obj.balance)
+        await crud_user.bump_data_version(db, id=owner_id)
+        if commit:
+            await db.commit()
+        return db_obj
 
-        from fastapi.encoders import jsonable_encoder
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: Account,
+        obj_in: Union[AccountUpdate, Dict[str, Any]],
+        commit: bool = True
+    ) -> Account:
+        """
+        Update an account, recording any direct balance change in the ledger.
+        A balance change locks (and refreshes) the account row first, like every
+        other balance write, so the recorded adjustment matches the stored balance.
+        """
+        update_data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=True)
+        if update_data.get("balance") is not None:
+            await db.execute(
+                select(self.model)
+                .filter(self.model.id == db_obj.id)
+                .with_for_update()
+                .execution_options(populate_existing=True)
+            )
+            await crud_ledger.record_adjustment(
+                db, account_id=db_obj.id, amount=update_data["balance"] - db_obj.balance
+            )
+        db_obj = await super().update(db, db_obj=db_obj, obj_in=update_data, commit=False)
+        await crud_user.bump_data_version(db, id=db_obj.owner_id)
+        if commit:
+            await db.commit()
+        return db_obj
 
-        obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data, owner_id=owner_id)
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
+    async def remove(self, db: AsyncSession, *, id: int, commit: bool = True) -> Optional[Account]:
+        """Remove an account, bumping its owner's data version."""
+        db_obj = await super().remove(db, id=id, commit=False)
+        if db_obj is not None:
+            await crud_user.bump_data_version(db, id=db_obj.owner_id)
+            if commit:
+                await db.commit()
         return db_obj
 
     async def get_multi_by_owner(
-        self, db: AsyncSession, *, owner_id: int, skip: int = 0, limit: int = 100
-    ) -> List[Account]:
-        """Get multiple accounts belonging to a specific owner."""
+        self, db: AsyncSession, *, owner_id: int, skip: int = 0, limit: int = 100, as_rows: bool = False
+    ) -> Union[List[Account], List[Row]]:
+        """
+        Get multiple accounts belonging to a specific owner.
+        With `as_rows`, plain column rows are returned instead of ORM objects.
+        """
+        query = select(*self.model.__table__.columns) if as_rows else select(self.model)
         result = await db.execute(
-            select(self.model)
+            query
             .filter(Account.owner_id == owner_id)
             .offset(skip)
             .limit(limit)
             .order_by(self.model.name)
         )
-        return result.scalars().all()
+        return result.all() if as_rows else result.scalars().all()
 
     async def get_by_owner(
         self, db: AsyncSession, *, owner_id: int, id: int
@@ -47,30 +96,73 @@ class CRUDAccount(CRUDBase[Account, AccountCreate, AccountUpdate]):
         return result.scalars().first()
 
     async def update_balance(
-        self, db: AsyncSession, *, account_id: int, amount_change: float
+        self, db: AsyncSession, *, account_id: int, amount_change: Decimal
     ) -> Optional[Account]:
         """
         Atomically update the balance of an account.
         Use amount_change > 0 for income/increase, < 0 for expense/decrease.
-        Uses SELECT FOR UPDATE to lock the row during the transaction.
+        A single UPDATE ... SET balance = balance + :change RETURNING takes the row
+        lock and returns the new state, so there is no separate SELECT FOR UPDATE.
         """
         result = await db.execute(
-            select(self.model)
-            .filter(self.model.id == account_id)
-            .with_for_update()
+            sqlalchemy_update(self.model)
+            .where(self.model.id == account_id)
+            .values(balance=self.model.balance + amount_change)
+            .returning(self.model)
+            .execution_options(populate_existing=True)
         )
-        account = result.scalars().first()
-
-        if not account:
-            return None
+        return result.scalars().first()
 
-        new_balance = account.balance + amount_change
+    async def apply_balance_deltas(
+        self, db: AsyncSession, *, deltas: Dict[int, Decimal]
+    ) -> None:
+        """
+        Add a delta to the balance of several accounts in one executemany round-trip.
+        Each row is updated in place (balance = balance + delta), which takes the row
+        lock for the rest of the transaction. Accounts are updated in ID order so
+        concurrent batches cannot deadlock on each other.
+        """
+        if not deltas:
+            return
+        table = self.model.__table__
         await db.execute(
-            sqlalchemy_update(self.model)
-            .where(self.model.id == account_id)
-            .values(balance=new_balance)
+            sqlalchemy_update(table)
+            .where(table.c.id == bindparam("b_account_id"))
+            .values(balance=table.c.balance + bindparam("b_delta")),
+            [{"b_account_id": account_id, "b_delta": delta} for account_id, delta in sorted(deltas.items())],
+        )
+
+    async def apply_owned_balance_deltas(
+        self, db: AsyncSession, *, owner_id: int, deltas: Dict[int, Decimal]
+    ) -> None:
+        """
+        Add a delta to the balance of several of an owner's accounts in one statement
+        (UPDATE ... FROM (VALUES ...) RETURNING id). The returned rows double as the
+        ownership check: raises AccountNotFound, leaving the caller to roll back, if
+        any account is missing or owned by someone else. Row locks are taken in ID
+        order so concurrent writers cannot deadlock on each other.
+        """
+        deltas = {account_id: delta for account_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        table = self.model.__table__
+        balance_deltas = values(
+            column("account_id", Integer), column("delta", table.c.balance.type), name="balance_deltas"
+        ).data(sorted(deltas.items()))
+        locked_ids = (
+            select(table.c.id)
+            .where(table.c.id.in_(list(deltas)), table.c.owner_id == owner_id)
+            .order_by(table.c.id)
+            .with_for_update()
+        )
+        result = await db.execute(
+            sqlalchemy_update(table)
+            .where(table.c.id == balance_deltas.c.account_id, table.c.id.in_(locked_ids))
+            .values(balance=table.c.balance + balance_deltas.c.delta)
+            .returning(table.c.id)
         )
-        account.balance = new_balance
-        return account
+        missing_ids = set(deltas) - set(result.scalars().all())
+        if missing_ids:
+            raise AccountNotFound(missing_ids)
 
 account = CRUDAccount(Account)
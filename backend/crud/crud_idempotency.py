@@ -0,0 +1,95 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy import select, delete as sqlalchemy_delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.cache import TTLCache
+from core.config import settings
+from crud.base import CRUDBase
+from db.models import IdempotencyKey
+
+# Stored responses replayed recently, keyed by (owner_id, key). Entries are
+# immutable once written, so a hit never needs re-checking against the table.
+_response_cache: TTLCache[Tuple[int, str], Dict[str, Any]] = TTLCache(
+    maxsize=settings.IDEMPOTENCY_CACHE_MAX_ENTRIES, ttl=settings.IDEMPOTENCY_CACHE_TTL_SECONDS
+)
+
+def _cutoff() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+
+class CRUDIdempotencyKey(CRUDBase[IdempotencyKey, BaseModel, BaseModel]):
+    """Stores and looks up the responses of idempotent writes."""
+
+    @staticmethod
+    def request_hash(method: str, path: str, body: BaseModel) -> str:
+        """
+        Fingerprint of a request, to tell a retry from a different request reusing the key.
+        Only fields the client sent count: defaults such as TransactionCreate.date
+        (the current time) differ between a request and its retry.
+        """
+        digest = hashlib.sha256(f"{method} {path}\n".encode())
+        digest.update(body.model_dump_json(exclude_unset=True).encode())
+        return digest.hexdigest()
+
+    async def get_response(self, db: AsyncSession, *, owner_id: int, key: str) -> Optional[Dict[str, Any]]:
+        """
+        The stored `request_hash`, `status_code` and `response` for an unexpired key,
+        from the in-process cache when possible, otherwise one indexed lookup.
+        """
+        stored = _response_cache.get((owner_id, key))
+        if stored is not None:
+            return stored
+        result = await db.execute(
+            select(self.model.request_hash, self.model.status_code, self.model.response)
+            .filter(self.model.owner_id == owner_id, self.model.key == key, self.model.created_at >= _cutoff())
+        )
+        row = result.mappings().first()
+        if row is None:
+            return None
+        stored = dict(row)
+        _response_cache.set((owner_id, key), stored)
+        return stored
+
+    async def save_response(
+        self,
+        db: AsyncSession,
+        *,
+        owner_id: int,
+        key: str,
+        request_hash: str,
+        status_code: int,
+        response: Any,
+    ) -> bool:
+        """
+        Store the response for a key in the caller's transaction, replacing an expired
+        entry. Returns False when a live entry already exists, i.e. a concurrent request
+        with the same key committed first; the caller should roll back and replay it.
+        Does not commit.
+        """
+        stmt = pg_insert(self.model).values(
+            owner_id=owner_id, key=key, request_hash=request_hash, status_code=status_code, response=response
+        )
+        result = await db.execute(
+            stmt.on_conflict_do_update(
+                constraint="uq_idempotency_keys_owner_key",
+                set_={
+                    "request_hash": stmt.excluded.request_hash,
+                    "status_code": stmt.excluded.status_code,
+                    "response": stmt.excluded.response,
+                    "created_at": stmt.excluded.created_at,
+                },
+                where=self.model.created_at < _cutoff(),
+            ).returning(self.model.id)
+        )
+        return result.first() is not None
+
+    async def purge_expired(self, db: AsyncSession) -> int:
+        """Delete expired keys. Does not commit; returns the number of rows removed."""
+        result = await db.execute(sqlalchemy_delete(self.model).where(self.model.created_at < _cutoff()))
+        return result.rowcount
+
+idempotency = CRUDIdempotencyKey(IdempotencyKey)
@@ -0,0 +1,152 @@
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+from pydantic import BaseModel
+from sqlalchemy import select, func, case, cast, literal, literal_column, Date, delete as sqlalchemy_delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from crud.base import CRUDBase
+from db.models import Account, AccountBalanceSnapshot, Transaction
+from schemas.account import AccountReconciliation
+from schemas.transaction import TransactionType
+
+# A movement is (account_id, when, net_change, transaction_count_change)
+Movement = Tuple[int, Union[date, datetime], Decimal, int]
+
+signed_amount = case((Transaction.type == TransactionType.INCOME, Transaction.amount), else_=-Transaction.amount)
+
+def month_start(value: Union[date, datetime]) -> date:
+    """First day of the (UTC) month containing `value`."""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        value = value.date()
+    return value.replace(day=1)
+
+class CRUDLedger(CRUDBase[AccountBalanceSnapshot, BaseModel, BaseModel]):
+    """Maintains the monthly balance snapshots that make up each account's ledger."""
+
+    async def _upsert(
+        self, db: AsyncSession, *, totals: Dict[Tuple[int, date], Tuple[Decimal, Decimal, int]]
+    ) -> None:
+        rows = [
+            {"account_id": account_id, "month": month, "net_change": net_change, "adjustment": adjustment, "transaction_count": count}
+            for (account_id, month), (net_change, adjustment, count) in sorted(totals.items())
+            if net_change or adjustment or count
+        ]
+        if not rows:
+            return
+        stmt = pg_insert(self.model).values(rows)
+        await db.execute(
+            stmt.on_conflict_do_update(
+                constraint="uq_account_balance_snapshots_account_month",
+                set_={
+                    "net_change": self.model.net_change + stmt.excluded.net_change,
+                    "adjustment": self.model.adjustment + stmt.excluded.adjustment,
+                    "transaction_count": self.model.transaction_count + stmt.excluded.transaction_count,
+                },
+            )
+        )
+
+    async def record(self, db: AsyncSession, *, movements: Iterable[Movement]) -> None:
+        """
+        Add transaction movements to the ledger with one multi-row upsert.
+        Movements for the same account and month are combined first. Does not commit.
+        """
+        totals: Dict[Tuple[int, date], list] = defaultdict(lambda: [Decimal(0), Decimal(0), 0])
+        for account_id, when, net_change, count in movements:
+            entry = totals[(account_id, month_start(when))]
+            entry[0] += net_change
+            entry[2] += count
+        await self._upsert(db, totals={key: tuple(value) for key, value in totals.items()})
+
+    async def record_adjustment(self, db: AsyncSession, *, account_id: int, amount: Decimal) -> None:
+        """Record a balance change that is not backed by a transaction (opening balance, manual edit)."""
+        if amount:
+            key = (account_id, month_start(datetime.now(timezone.utc)))
+            await self._upsert(db, totals={key: (Decimal(0), amount, 0)})
+
+    async def reconcile(self, db: AsyncSession, *, account: Account) -> AccountReconciliation:
+        """
+        Compare the account balance with its ledger, re-checking the most recent
+        snapshot month (and anything after it) against the transactions table.
+        Older months are trusted, so this reads a handful of rows instead of the
+        whole history.
+        """
+        ledger_balance, last_month = (await db.execute(
+            select(
+                func.coalesce(func.sum(self.model.net_change + self.model.adjustment), 0),
+                func.max(self.model.month),
+            ).filter(self.model.account_id == account.id)
+        )).one()
+
+        snapshot_net_change = recomputed_net_change = Decimal(0)
+        if last_month is not None:
+            snapshot_net_change = (await db.execute(
+                select(func.coalesce(func.sum(self.model.net_change), 0))
+                .filter(self.model.account_id == account.id, self.model.month >= last_month)
+            )).scalar_one()
+            month_start_at = datetime(last_month.year, last_month.month, 1, tzinfo=timezone.utc)
+            recomputed_net_change = (await db.execute(
+                select(func.coalesce(func.sum(signed_amount), 0))
+                .filter(
+                    Transaction.owner_id == account.owner_id,
+                    Transaction.account_id == account.id,
+                    Transaction.date >= month_start_at,
+                )
+            )).scalar_one()
+
+        in_sync = account.balance == ledger_balance and snapshot_net_change == recomputed_net_change
+        return AccountReconciliation(
+            account_id=account.id,
+            balance=account.balance,
+            ledger_balance=ledger_balance,
+            snapshot_month=last_month,
+            snapshot_net_change=snapshot_net_change,
+            recomputed_net_change=recomputed_net_change,
+            in_sync=in_sync,
+        )
+
+    async def rebuild(self, db: AsyncSession, *, account: Account) -> None:
+        """
+        Rebuild an account's ledger from its full transaction history. Whatever part
+        of the balance the transactions do not explain is kept as an adjustment in
+        the current month. Scans all of the account's transactions; meant for repairs
+        and for accounts created before the ledger existed. Does not commit.
+
+        Locks the account row first (refreshing `account`), so transaction writes,
+        which take that lock before touching the ledger, wait until the caller commits
+        and cannot slip in between the balance and the transactions read here.
+        """
+        await db.execute(
+            select(Account)
+            .filter(Account.id == account.id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        await db.execute(sqlalchemy_delete(self.model).where(self.model.account_id == account.id))
+        # Inlined unit so SELECT and GROUP BY render the same expression
+        month = func.date_trunc(literal_column("'month'"), func.timezone("UTC", Transaction.date))
+        await db.execute(
+            pg_insert(self.model).from_select(
+                ["account_id", "month", "net_change", "adjustment", "transaction_count"],
+                select(
+                    Transaction.account_id,
+                    cast(month, Date),
+                    func.sum(signed_amount),
+                    literal(0),
+                    func.count(Transaction.id),
+                )
+                .filter(Transaction.owner_id == account.owner_id, Transaction.account_id == account.id)
+                .group_by(Transaction.account_id, month),
+            )
+        )
+        transactions_total = (await db.execute(
+            select(func.coalesce(func.sum(self.model.net_change), 0)).filter(self.model.account_id == account.id)
+        )).scalar_one()
+        await self.record_adjustment(db, account_id=account.id, amount=account.balance - transactions_total)
+
+ledger = CRUDLedger(AccountBalanceSnapshot)
@@ -0,0 +1,128 @@
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from pydantic import BaseModel
+from sqlalchemy import select, func, cast, literal_column, text, Date, delete as sqlalchemy_delete, RowMapping
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from crud.base import CRUDBase
+from db.models import MonthlyRollup, Transaction
+from schemas.transaction import TransactionType
+from .crud_ledger import month_start
+
+# A movement is (owner_id, account_id, when, type, category, amount_change, transaction_count_change)
+RollupMovement = Tuple[int, int, Union[date, datetime], Union[TransactionType, str], Optional[str], Decimal, int]
+
+class CRUDRollup(CRUDBase[MonthlyRollup, BaseModel, BaseModel]):
+    """Maintains the per-owner monthly rollups of transactions."""
+
+    async def record(self, db: AsyncSession, *, movements: Iterable[RollupMovement]) -> None:
+        """
+        Add transaction movements to the rollups with one multi-row upsert.
+        Movements with the same key are combined first. Does not commit.
+        """
+        totals: Dict[tuple, list] = defaultdict(lambda: [Decimal(0), 0])
+        for owner_id, account_id, when, transaction_type, category, amount, count in movements:
+            entry = totals[(owner_id, month_start(when), account_id, TransactionType(transaction_type), category)]
+            entry[0] += amount
+            entry[1] += count
+
+        rows = [
+            {
+                "owner_id": owner_id, "month": month, "account_id": account_id, "type": transaction_type,
+                "category": category, "total": total, "transaction_count": count,
+            }
+            # Sorted so concurrent writers lock rows in the same order
+            for (owner_id, month, account_id, transaction_type, category), (total, count)
+            in sorted(totals.items(), key=lambda item: (item[0][:4], item[0][4] or ""))
+            if total or count
+        ]
+        if not rows:
+            return
+        stmt = pg_insert(self.model).values(rows)
+        await db.execute(
+            stmt.on_conflict_do_update(
+                constraint="uq_monthly_rollups_key",
+                set_={
+                    "total": self.model.total + stmt.excluded.total,
+                    "transaction_count": self.model.transaction_count + stmt.excluded.transaction_count,
+                },
+            )
+        )
+
+    async def get_by_owner(
+        self,
+        db: AsyncSession,
+        *,
+        owner_id: int,
+        start_month: Optional[date] = None,
+        end_month: Optional[date] = None,
+        account_id: Optional[int] = None,
+        transaction_type: Optional[TransactionType] = None,
+    ) -> List[RowMapping]:
+        """
+        Monthly totals by type and category for an owner, summed over accounts
+        unless `account_id` is given. Both month bounds are inclusive.
+        """
+        query = (
+            select(
+                self.model.month,
+                self.model.type,
+                self.model.category,
+                func.sum(self.model.total).label("total"),
+                func.sum(self.model.transaction_count).label("count"),
+            )
+            .filter(self.model.owner_id == owner_id, self.model.transaction_count > 0)
+        )
+        if start_month:
+            query = query.filter(self.model.month >= month_start(start_month))
+        if end_month:
+            query = query.filter(self.model.month <= month_start(end_month))
+        if account_id is not None:
+            query = query.filter(self.model.account_id == account_id)
+        if transaction_type:
+            query = query.filter(self.model.type == transaction_type)
+        query = (
+            query.group_by(self.model.month, self.model.type, self.model.category)
+            .order_by(self.model.month, self.model.type, self.model.category)
+        )
+        result = await db.execute(query)
+        return result.mappings().all()
+
+    async def rebuild(self, db: AsyncSession, *, owner_id: Optional[int] = None) -> None:
+        """
+        Rebuild the rollups of one owner (or everyone) from the transactions table.
+        Blocks concurrent rollup writes until the caller commits, so transactions
+        written meanwhile are neither lost nor counted twice. Does not commit.
+        """
+        await db.execute(text(f"LOCK TABLE {self.model.__tablename__} IN EXCLUSIVE MODE"))
+        delete_stmt = sqlalchemy_delete(self.model)
+        if owner_id is not None:
+            delete_stmt = delete_stmt.where(self.model.owner_id == owner_id)
+        await db.execute(delete_stmt)
+
+        # Inlined unit so SELECT and GROUP BY render the same expression
+        month = func.date_trunc(literal_column("'month'"), func.timezone("UTC", Transaction.date))
+        query = select(
+            Transaction.owner_id,
+            Transaction.account_id,
+            cast(month, Date),
+            Transaction.type,
+            Transaction.category,
+            func.sum(Transaction.amount),
+            func.count(Transaction.id),
+        )
+        if owner_id is not None:
+            query = query.filter(Transaction.owner_id == owner_id)
+        query = query.group_by(Transaction.owner_id, Transaction.account_id, month, Transaction.type, Transaction.category)
+        await db.execute(
+            pg_insert(self.model).from_select(
+                ["owner_id", "account_id", "month", "type", "category", "total", "transaction_count"],
+                query,
+            )
+        )
+
+rollup = CRUDRollup(MonthlyRollup)
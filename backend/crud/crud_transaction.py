@@ -1,66 +1,195 @@
-from typing import List, Optional
-from sqlalchemy import select, delete as sqlalchemy_delete
+import base64
+import json
+from collections import defaultdict
+from decimal import Decimal
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
+from sqlalchemy import select, insert, func, literal, literal_column, or_, tuple_, update as sqlalchemy_update, delete as sqlalchemy_delete, Row, RowMapping, Select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from crud.base import CRUDBase
 from db.models import Transaction, Account
-from schemas.transaction import TransactionCreate, TransactionUpdate, TransactionType
-from .crud_account import account as crud_account
+from schemas.transaction import KNOWN_CATEGORIES, TransactionCreate, TransactionUpdate, TransactionType, SummaryGranularity
+from .crud_account import account as crud_account, AccountNotFound
+from .crud_ledger import ledger as crud_ledger
+from .crud_rollup import rollup as crud_rollup
+from .crud_user import user as crud_user
 
 from datetime import datetime, timezone, timedelta # Import timezone and timedelta
 
+# Columns written by the export, in output order
+EXPORT_COLUMNS = (
+    Transaction.id,
+    Transaction.date,
+    Transaction.type,
+    Transaction.amount,
+    Transaction.category,
+    Transaction.description,
+    Transaction.account_id,
+    Transaction.created_at,
+    Transaction.updated_at,
+)
+
+# Lower-cased known category -> stored spelling, for the exact-match category filter
+_KNOWN_CATEGORY_NAMES = frozenset(category.lower() for category in KNOWN_CATEGORIES)
+
+# Case- and whitespace-insensitive category, served by ix_transactions_category_normalized
+_normalized_category = func.lower(func.btrim(Transaction.category))
+
+def _contains_pattern(term: str) -> str:
+    """ILIKE pattern matching `term` anywhere, with LIKE wildcards in it taken literally."""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+# Columns loaded by `copy_records`, in record order
+COPY_COLUMNS = ("amount", "type", "category", "date", "description", "account_id", "owner_id")
+
+def _amount_effect(amount: Decimal, transaction_type: TransactionType) -> Decimal:
+    """Signed effect of a transaction on its account balance."""
+    return amount if transaction_type == TransactionType.INCOME else -amount
+
+def encode_cursor(transaction: Transaction) -> str:
+    """Encode the (date, id) of the last row of a page into an opaque cursor."""
+    raw = json.dumps([transaction.date.isoformat(), transaction.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by `encode_cursor`. Raises ValueError if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        date_str, last_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(date_str), int(last_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid pagination cursor.") from e
+
 class CRUDTransaction(CRUDBase[Transaction, TransactionCreate, TransactionUpdate]):
     """CRUD operations for Transaction model."""
 
     async def create_with_owner(
-        self, db: AsyncSession, *, obj_in: TransactionCreate, owner_id: int
+        self, db: AsyncSession, *, obj_in: TransactionCreate, owner_id: int, commit: bool = True
     ) -> Transaction:
         """
         Create a new transaction, link to owner, and update account balance atomically.
+        The balance UPDATE (scoped to the owner's account) and the INSERT run as one
+        statement: `WITH updated_account AS (UPDATE accounts ... RETURNING id)
+        INSERT INTO transactions ... SELECT ... FROM updated_account RETURNING *`.
+        No row comes back when the account is missing or not the owner's, which
+        raises AccountNotFound.
         """
+        amount_change = _amount_effect(obj_in.amount, obj_in.type)
+        accounts = Account.__table__
+        updated_account = (
+            sqlalchemy_update(accounts)
+            .where(accounts.c.id == obj_in.account_id, accounts.c.owner_id == owner_id)
+            .values(balance=accounts.c.balance + amount_change)
+            .returning(accounts.c.id)
+            .cte("updated_account")
+        )
+        columns = self.model.__table__.c
+        row_values = select(
+            literal(obj_in.amount, columns.amount.type),
+            literal(TransactionType(obj_in.type), columns.type.type),
+            literal(obj_in.category, columns.category.type),
+            literal(obj_in.date, columns.date.type),
+            literal(obj_in.description, columns.description.type),
+            literal(owner_id, columns.owner_id.type),
+            updated_account.c.id,
+        )
+        result = await db.scalars(
+            insert(self.model)
+            .from_select(["amount", "type", "category", "date", "description", "owner_id", "account_id"], row_values)
+            .returning(self.model)
+        )
+        db_obj = result.one_or_none()
+        if db_obj is None:
+            raise AccountNotFound([obj_in.account_id])
 
-        amount_change = obj_in.amount if obj_in.type == TransactionType.INCOME else -obj_in.amount
-        updated_account = await crud_account.update_balance(
-            db=db,
-            account_id=obj_in.account_id,
-            amount_change=amount_change
+        await crud_ledger.record(db, movements=[(obj_in.account_id, obj_in.date, amount_change, 1)])
+        await crud_rollup.record(db, movements=[
+            (owner_id, obj_in.account_id, obj_in.date, obj_in.type, obj_in.category, obj_in.amount, 1)
+        ])
+        await crud_user.bump_data_version(db, id=owner_id)
+        if commit:
+            await db.commit()
+        return db_obj
+
+    async def create_multi_with_owner(
+        self, db: AsyncSession, *, objs_in: List[TransactionCreate], owner_id: int, commit: bool = True
+    ) -> List[Transaction]:
+        """
+        Create several transactions for an owner in a single database transaction.
+        All rows go in through one multi-row INSERT ... RETURNING, and all affected
+        accounts get their combined deltas in one owner-scoped UPDATE, which raises
+        AccountNotFound if any account is missing or not the owner's.
+        """
+        if not objs_in:
+            return []
+
+        deltas: Dict[int, Decimal] = defaultdict(Decimal)
+        for obj_in in objs_in:
+            deltas[obj_in.account_id] += _amount_effect(obj_in.amount, obj_in.type)
+        await crud_account.apply_owned_balance_deltas(db=db, owner_id=owner_id, deltas=deltas)
+        await crud_ledger.record(
+            db,
+            movements=[(obj_in.account_id, obj_in.date, _amount_effect(obj_in.amount, obj_in.type), 1) for obj_in in objs_in],
+        )
+        await crud_rollup.record(
+            db,
+            movements=[
+                (owner_id, obj_in.account_id, obj_in.date, obj_in.type, obj_in.category, obj_in.amount, 1)
+                for obj_in in objs_in
+            ],
         )
 
-        if not updated_account:
-            raise ValueError(f"Account with id {obj_in.account_id} not found for balance update.")
-
-        # Create Transaction Record directly from the Pydantic model fields
-        db_obj = self.model(
-            amount=obj_in.amount,
-            type=obj_in.type,
-            category=obj_in.category,
-            date=obj_in.date,  # This will now be a proper `datetime.datetime` object
-            description=obj_in.description,
-            account_id=obj_in.account_id,
-            owner_id=owner_id
+        result = await db.scalars(
+            insert(self.model).returning(self.model, sort_by_parameter_order=True),
+            [
+                {
+                    "amount": obj_in.amount,
+                    "type": obj_in.type,
+                    "category": obj_in.category,
+                    "date": obj_in.date,
+                    "description": obj_in.description,
+                    "account_id": obj_in.account_id,
+                    "owner_id": owner_id,
+                }
+                for obj_in in objs_in
+            ],
         )
+        db_objs = result.all()
+        await crud_user.bump_data_version(db, id=owner_id)
+        if commit:
+            await db.commit()
+        return db_objs
 
-        db.add(db_obj)
-        await db.flush()
-        await db.commit()
-        await db.refresh(db_obj)
-        return db_obj
+    async def copy_records(
+        self, db: AsyncSession, *, records: List[tuple]
+    ) -> None:
+        """
+        Load raw records (in COPY_COLUMNS order) into the transactions table with COPY.
+        Runs inside the session's transaction; does not touch balances or commit.
+        """
+        if not records:
+            return
+        connection = await db.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            self.model.__tablename__, records=records, columns=COPY_COLUMNS
+        )
 
-    async def get_multi_by_owner_and_account(
+    def _apply_filters(
         self,
-        db: AsyncSession,
+        query: Select,
         *,
         owner_id: int,
         account_id: Optional[int] = None,
-        skip: int = 0,
-        limit: int = 100,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
         category: Optional[str] = None,
+        q: Optional[str] = None,
         transaction_type: Optional[TransactionType] = None,
-    ) -> List[Transaction]:
-        """Get multiple transactions for an owner, optionally filtered by account and other criteria."""
-        query = select(self.model).filter(Transaction.owner_id == owner_id)
+    ) -> Select:
+        """Apply the owner scope and the optional listing filters to a select on transactions."""
+        query = query.filter(Transaction.owner_id == owner_id)
 
         if account_id is not None:
             query = query.filter(Transaction.account_id == account_id)
@@ -82,14 +211,138 @@ class CRUDTransaction(CRUDBase[Transaction, TransactionCreate, TransactionUpdate
             query = query.filter(Transaction.date < end_bound_exclusive)
 
         if category:
-            query = query.filter(Transaction.category.ilike(f"%{category}%")) # Case-insensitive search
+            category_name = category.strip().lower()
+            if category_name in _KNOWN_CATEGORY_NAMES:
+                # A parser category name is matched whole, ignoring case and surrounding spaces
+                query = query.filter(_normalized_category == category_name)
+            else:
+                query = query.filter(Transaction.category.ilike(_contains_pattern(category), escape="\\")) # Case-insensitive search
+        if q:
+            pattern = _contains_pattern(q)
+            query = query.filter(or_(
+                Transaction.category.ilike(pattern, escape="\\"),
+                Transaction.description.ilike(pattern, escape="\\"),
+            ))
         if transaction_type:
             query = query.filter(Transaction.type == transaction_type)
+        return query
+
+    async def get_multi_by_owner_and_account(
+        self,
+        db: AsyncSession,
+        *,
+        owner_id: int,
+        account_id: Optional[int] = None,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        category: Optional[str] = None,
+        q: Optional[str] = None,
+        transaction_type: Optional[TransactionType] = None,
+        as_rows: bool = False,
+    ) -> Union[List[Transaction], List[Row]]:
+        """
+        Get multiple transactions for an owner, optionally filtered by account and other criteria.
+        When `cursor` is given, `skip` is ignored and the page starts right after the
+        (date, id) encoded in it, so deep pages cost the same as the first one.
+        With `as_rows`, plain column rows are returned instead of ORM objects.
+        """
+        query = self._apply_filters(
+            select(*self.model.__table__.columns) if as_rows else select(self.model),
+            owner_id=owner_id,
+            account_id=account_id,
+            start_date=start_date,
+            end_date=end_date,
+            category=category,
+            q=q,
+            transaction_type=transaction_type,
+        )
 
+        if cursor:
+            last_date, last_id = decode_cursor(cursor)
+            query = query.filter(
+                tuple_(Transaction.date, Transaction.id) < tuple_(last_date, last_id),
+                # Implied by the row comparison, but only a plain bound lets Postgres prune partitions
+                Transaction.date <= last_date,
+            )
+        else:
+            query = query.offset(skip)
 
-        query = query.order_by(self.model.date.desc()).offset(skip).limit(limit) # Order by date descending
+        # id breaks ties between equal dates so cursors are stable
+        query = query.order_by(self.model.date.desc(), self.model.id.desc()).limit(limit)
         result = await db.execute(query)
-        return result.scalars().all()
+        return result.all() if as_rows else result.scalars().all()
+
+    async def stream_by_owner(
+        self,
+        db: AsyncSession,
+        *,
+        owner_id: int,
+        account_id: Optional[int] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        category: Optional[str] = None,
+        q: Optional[str] = None,
+        transaction_type: Optional[TransactionType] = None,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Stream an owner's transactions as plain column rows (see EXPORT_COLUMNS), newest first.
+        Uses a server-side cursor and yields chunks of `chunk_size` rows, so memory use
+        does not depend on how many transactions the owner has.
+        """
+        query = self._apply_filters(
+            select(*EXPORT_COLUMNS),
+            owner_id=owner_id,
+            account_id=account_id,
+            start_date=start_date,
+            end_date=end_date,
+            category=category,
+            q=q,
+            transaction_type=transaction_type,
+        )
+        query = query.order_by(self.model.date.desc(), self.model.id.desc()).execution_options(yield_per=chunk_size)
+        result = await db.stream(query)
+        async for rows in result.partitions():
+            yield rows
+
+    async def get_summary_by_owner(
+        self,
+        db: AsyncSession,
+        *,
+        owner_id: int,
+        granularity: SummaryGranularity = SummaryGranularity.DAY,
+        account_id: Optional[int] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        transaction_type: Optional[TransactionType] = None,
+    ) -> List[RowMapping]:
+        """
+        Aggregate an owner's transactions into per-period totals grouped by type and category.
+        Runs as a single GROUP BY so only the buckets leave the database.
+        """
+        # The unit is inlined rather than bound: Postgres treats two bound
+        # date_trunc() calls as different expressions in SELECT and GROUP BY.
+        period = func.date_trunc(literal_column(f"'{granularity.value}'"), Transaction.date).label("period")
+        query = self._apply_filters(
+            select(
+                period,
+                Transaction.type,
+                Transaction.category,
+                func.sum(Transaction.amount).label("total"),
+                func.count(Transaction.id).label("count"),
+            ),
+            owner_id=owner_id,
+            account_id=account_id,
+            start_date=start_date,
+            end_date=end_date,
+            transaction_type=transaction_type,
+        )
+        query = query.group_by(period, Transaction.type, Transaction.category).order_by(period, Transaction.type, Transaction.category)
+        result = await db.execute(query)
+        return result.mappings().all()
 
     async def get_by_owner(
         self, db: AsyncSession, *, owner_id: int, id: int
@@ -105,61 +358,73 @@ class CRUDTransaction(CRUDBase[Transaction, TransactionCreate, TransactionUpdate
         db: AsyncSession,
         *,
         db_obj: Transaction,
-        obj_in: TransactionUpdate
+        obj_in: TransactionUpdate,
+        commit: bool = True
     ) -> Optional[Transaction]:
         """
         Update a transaction and adjust account balances accordingly.
-        Handles changes in amount, type, and account_id.
+        Handles changes in amount, type, and account_id. The balance changes of the
+        old and new account go out as one owner-scoped UPDATE, which raises
+        AccountNotFound if the new account is missing or not the owner's.
         """
+        update_data = obj_in.model_dump(exclude_unset=True)
 
-        from fastapi.encoders import jsonable_encoder
-        update_data = obj_in.dict(exclude_unset=True)
-
-        original_amount_effect = db_obj.amount if db_obj.type == TransactionType.INCOME else -db_obj.amount
+        original_amount_effect = _amount_effect(db_obj.amount, db_obj.type)
         new_amount = update_data.get("amount", db_obj.amount)
         new_type = update_data.get("type", db_obj.type)
         new_account_id = update_data.get("account_id", db_obj.account_id)
-        new_amount_effect = new_amount if new_type == TransactionType.INCOME else -new_amount
+        new_amount_effect = _amount_effect(new_amount, new_type)
+
+        new_date = update_data.get("date") or db_obj.date
+        new_category = update_data["category"] if "category" in update_data else db_obj.category
 
         account_changed = new_account_id != db_obj.account_id
         amount_or_type_changed = new_amount_effect != original_amount_effect
 
-        if account_changed:
-            old_account_update = await crud_account.update_balance(db=db, account_id=db_obj.account_id, amount_change=-original_amount_effect)
-            if not old_account_update: raise ValueError("Original account not found during update.")
-            new_account_update = await crud_account.update_balance(db=db, account_id=new_account_id, amount_change=new_amount_effect)
-            if not new_account_update: raise ValueError("New account not found during update.")
-        elif amount_or_type_changed:
-            balance_diff = new_amount_effect - original_amount_effect
-            account_update = await crud_account.update_balance(db=db, account_id=db_obj.account_id, amount_change=balance_diff)
-            if not account_update: raise ValueError("Account not found during update.")
-
-        for field in jsonable_encoder(db_obj):
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-
-        db.add(db_obj)
-        await db.flush()
-        await db.refresh(db_obj)
+        deltas: Dict[int, Decimal] = defaultdict(Decimal)
+        deltas[db_obj.account_id] -= original_amount_effect
+        deltas[new_account_id] += new_amount_effect
+        await crud_account.apply_owned_balance_deltas(db=db, owner_id=db_obj.owner_id, deltas=deltas)
+
+        if account_changed or amount_or_type_changed or new_date != db_obj.date:
+            await crud_ledger.record(db, movements=[
+                (db_obj.account_id, db_obj.date, -original_amount_effect, -1),
+                (new_account_id, new_date, new_amount_effect, 1),
+            ])
+
+        if (account_changed or new_date != db_obj.date or new_amount != db_obj.amount
+                or new_type != db_obj.type or new_category != db_obj.category):
+            await crud_rollup.record(db, movements=[
+                (db_obj.owner_id, db_obj.account_id, db_obj.date, db_obj.type, db_obj.category, -db_obj.amount, -1),
+                (db_obj.owner_id, new_account_id, new_date, new_type, new_category, new_amount, 1),
+            ])
+
+        db_obj = await self.update(db, db_obj=db_obj, obj_in=update_data, commit=False)
+        await crud_user.bump_data_version(db, id=db_obj.owner_id)
+        if commit:
+            await db.commit()
         return db_obj
 
 
     async def remove_transaction_and_balance(
-        self, db: AsyncSession, *, id: int, owner_id: int
+        self, db: AsyncSession, *, id: int, owner_id: int, commit: bool = True
     ) -> Optional[Transaction]:
         """
         Remove a transaction by ID and revert its effect on the account balance.
-        Ensures the transaction belongs to the owner.
+        Ensures the transaction belongs to the owner: the DELETE is owner-scoped and
+        returns the removed row, so no SELECT precedes it.
         """
-
-        transaction_to_delete = await self.get_by_owner(db=db, id=id, owner_id=owner_id)
-
+        result = await db.scalars(
+            sqlalchemy_delete(self.model)
+            .where(self.model.id == id, self.model.owner_id == owner_id)
+            .returning(self.model)
+            .execution_options(synchronize_session=False)
+        )
+        transaction_to_delete = result.one_or_none()
         if not transaction_to_delete:
             return None
 
-        amount_effect_to_revert = transaction_to_delete.amount if transaction_to_delete.type == TransactionType.INCOME else -transaction_to_delete.amount
-        balance_change = -amount_effect_to_revert
-
+        balance_change = -_amount_effect(transaction_to_delete.amount, transaction_to_delete.type)
         updated_account = await crud_account.update_balance(
             db=db,
             account_id=transaction_to_delete.account_id,
@@ -168,9 +433,14 @@ class CRUDTransaction(CRUDBase[Transaction, TransactionCreate, TransactionUpdate
 
         if not updated_account:
             raise ValueError(f"Account with id {transaction_to_delete.account_id} not found for balance revert during delete.")
-
-        await db.delete(transaction_to_delete)
-        await db.flush()
-        return transaction_to_delete 
+        await crud_ledger.record(db, movements=[(transaction_to_delete.account_id, transaction_to_delete.date, balance_change, -1)])
+        await crud_rollup.record(db, movements=[(
+            owner_id, transaction_to_delete.account_id, transaction_to_delete.date,
+            transaction_to_delete.type, transaction_to_delete.category, -transaction_to_delete.amount, -1,
+        )])
+        await crud_user.bump_data_version(db, id=owner_id)
+        if commit:
+            await db.commit()
+        return transaction_to_delete
 
 transaction = CRUDTransaction(Transaction)
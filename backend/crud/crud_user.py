@@ -1,38 +1,88 @@
 from typing import Any, Dict, Optional, Union
 
-from sqlalchemy import select
+from sqlalchemy import select, update as sqlalchemy_update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
-from core.security import get_password_hash, verify_password
+from core.cache import TTLCache
+from core.config import settings
+from core.security import get_password_hash, verify_and_update_password
 from crud.base import CRUDBase
 from db.models import User
 from schemas.user import UserCreate, UserUpdate
 
+# Column snapshots of recently authenticated users, keyed by user id.
+# The password hash is left out; it is never needed to serve a request.
+_identity_cache: TTLCache[int, Dict[str, Any]] = TTLCache(
+    maxsize=settings.USER_CACHE_MAX_ENTRIES, ttl=settings.USER_CACHE_TTL_SECONDS
+)
+# data_version is left out too; it changes on every write and is read fresh when needed.
+_CACHED_COLUMNS = [
+    column.key for column in User.__table__.columns if column.key not in ("hashed_password", "data_version")
+]
+
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     """CRUD operations for User model."""
 
+    async def get_cached(self, db: AsyncSession, *, id: int) -> Optional[User]:
+        """
+        Get a user by ID for request authentication, served from a short-TTL
+        in-process cache when possible. Cached users are detached copies built
+        from a snapshot, so changes made in other workers show up within
+        USER_CACHE_TTL_SECONDS.
+        """
+        snapshot = _identity_cache.get(id)
+        if snapshot is None:
+            db_obj = await self.get(db, id=id)
+            if db_obj is None:
+                return None
+            snapshot = {key: getattr(db_obj, key) for key in _CACHED_COLUMNS}
+            _identity_cache.set(id, snapshot)
+            return db_obj
+        cached_user = self.model(**snapshot)
+        make_transient_to_detached(cached_user)
+        return cached_user
+
+    def invalidate_cached(self, *, id: int) -> None:
+        """Drop a user from the identity cache, e.g. after an update or deactivation."""
+        _identity_cache.pop(id)
+
+    async def get_data_version(self, db: AsyncSession, *, id: int) -> Optional[int]:
+        """The user's current data version (one primary key lookup), or None if there is no such user."""
+        result = await db.execute(select(self.model.data_version).filter(self.model.id == id))
+        return result.scalar_one_or_none()
+
+    async def bump_data_version(self, db: AsyncSession, *, id: int) -> None:
+        """
+        Increment the user's data version in the caller's transaction, invalidating
+        the ETags of their lists once it commits. Call it last in a write: the row
+        lock it takes is then held only until the commit. Does not commit.
+        """
+        await db.execute(
+            sqlalchemy_update(self.model)
+            .where(self.model.id == id)
+            .values(data_version=self.model.data_version + 1)
+            .execution_options(synchronize_session=False)
+        )
+
     async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
         """Get a user by email."""
         result = await db.execute(select(self.model).filter(self.model.email == email))
         return result.scalars().first()
 
-    async def create(self, db: AsyncSession, *, obj_in: UserCreate) -> User:
+    async def create(self, db: AsyncSession, *, obj_in: UserCreate, commit: bool = True) -> User:
         """Create a new user, hashing the password."""
-        create_data = obj_in.dict(exclude={"password"})
-        create_data["hashed_password"] = get_password_hash(obj_in.password)
-
-        db_obj = self.model(**create_data)
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
-        return db_obj
+        create_data = obj_in.model_dump(exclude={"password"})
+        create_data["hashed_password"] = await get_password_hash(obj_in.password)
+        return await super().create(db, obj_in=create_data, commit=commit)
 
     async def update(
         self,
         db: AsyncSession,
         *,
         db_obj: User,
-        obj_in: Union[UserUpdate, Dict[str, Any]]
+        obj_in: Union[UserUpdate, Dict[str, Any]],
+        commit: bool = True
     ) -> User:
         """Update a user, hashing the password if provided."""
         if isinstance(obj_in, dict):
@@ -41,13 +91,21 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             update_data = obj_in.dict(exclude_unset=True)
 
         if "password" in update_data and update_data["password"]:
-            hashed_password = get_password_hash(update_data["password"])
+            hashed_password = await get_password_hash(update_data["password"])
             update_data["hashed_password"] = hashed_password
             del update_data["password"] 
         elif "password" in update_data:
              del update_data["password"] 
 
-        return await super().update(db, db_obj=db_obj, obj_in=update_data)
+        updated_user = await super().update(db, db_obj=db_obj, obj_in=update_data, commit=commit)
+        self.invalidate_cached(id=updated_user.id)
+        return updated_user
+
+    async def remove(self, db: AsyncSession, *, id: int, commit: bool = True) -> Optional[User]:
+        """Remove a user and drop it from the identity cache."""
+        removed_user = await super().remove(db, id=id, commit=commit)
+        self.invalidate_cached(id=id)
+        return removed_user
 
     async def authenticate(
         self, db: AsyncSession, *, email: str, password: str
@@ -58,8 +116,14 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             return None
         if not user.is_active: 
             return None
-        if not verify_password(password, user.hashed_password):
+        is_valid, new_hash = await verify_and_update_password(password, user.hashed_password)
+        if not is_valid:
             return None
+        if new_hash:
+            # Stored hash uses an outdated bcrypt cost; upgrade it while we have the password
+            user.hashed_password = new_hash
+            db.add(user)
+            await db.commit()
         return user
 
 user = CRUDUser(User)
@@ -1,24 +1,94 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
-from typing import AsyncGenerator
+import itertools
+import logging
+from pathlib import Path
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+from typing import AsyncGenerator, Optional
 
+from core.cache import TTLCache
 from core.config import settings
-from .base_class import Base
+from .pool import InstrumentedQueuePool
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    echo=True,
-)
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+def _create_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        poolclass=InstrumentedQueuePool,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        connect_args={
+            # asyncpg's own cache and SQLAlchemy's adapter-level cache of prepared statements
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        },
+    )
+
+class PrimarySession(Session):
+    """Sync session class behind AsyncSessionFactory, so commit hooks only see primary writes."""
+
+engine = _create_engine(settings.DATABASE_URL)
 
 AsyncSessionFactory = sessionmaker(
     bind=engine,
     class_=AsyncSession,
+    sync_session_class=PrimarySession,
     expire_on_commit=False,
     autoflush=False,
     autocommit=False
 )
 
+replica_engines = [
+    _create_engine(url.strip()) for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()
+]
+
+ReplicaSessionFactories = [
+    sessionmaker(
+        bind=replica_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autoflush=False,
+        autocommit=False
+    )
+    for replica_engine in replica_engines
+]
+_replica_rotation = itertools.cycle(ReplicaSessionFactories)
+
+# Users who committed on the primary recently, keyed by user id. Their reads stay
+# on the primary until replication has (very likely) caught up. This only covers
+# the worker process that took the write; the X-Read-Your-Writes token (see
+# main.read_your_writes_header) carries the pin to every other worker and instance.
+_recent_writers: TTLCache[int, bool] = TTLCache(
+    maxsize=settings.USER_CACHE_MAX_ENTRIES, ttl=settings.DB_READ_YOUR_WRITES_SECONDS
+)
+
+@event.listens_for(PrimarySession, "after_commit")
+def _pin_writer_to_primary(session: Session):
+    user_id = session.info.get("user_id")
+    if user_id is not None:
+        _recent_writers.set(user_id, True)
+        session.info["committed"] = True
+
+def read_session_factory(user_id: Optional[int] = None, *, pinned: bool = False) -> sessionmaker:
+    """
+    Session factory for read-only work: the next replica in round-robin order,
+    or the primary when there are no replicas, the caller holds a read pin
+    (`pinned`), or `user_id` wrote recently through this worker.
+    """
+    if not ReplicaSessionFactories or pinned or (user_id is not None and _recent_writers.get(user_id)):
+        return AsyncSessionFactory
+    return next(_replica_rotation)
+
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """
     FastAPI dependency to get an async database session.
@@ -27,7 +97,36 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionFactory() as session:
         yield session
 
-async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+def pool_stats() -> dict:
+    return {
+        "primary": engine.pool.stats(),
+        "replicas": [replica_engine.pool.stats() for replica_engine in replica_engines],
+    }
+
+def alembic_config() -> Config:
+    """Alembic configuration for the migrations shipped next to this package."""
+    return Config(str(ALEMBIC_INI))
+
+async def check_db_revision():
+    """
+    Compare the database's migration revision with the latest one in
+    `migrations/versions`. Startup only reads `alembic_version`; schema changes
+    are applied out of band with `python manage.py migrate upgrade`.
+    """
+    head = ScriptDirectory.from_config(alembic_config()).get_current_head()
+    async with engine.connect() as conn:
+        current = await conn.run_sync(
+            lambda sync_conn: MigrationContext.configure(sync_conn).get_current_revision()
+        )
+
+    if current == head:
+        logger.info(f"Database schema is at revision {current}.")
+        return
 
+    message = (
+        f"Database schema is at revision {current or '<none>'}, expected {head}. "
+        "Run `python manage.py migrate upgrade`."
+    )
+    if settings.DB_REQUIRE_CURRENT_REVISION:
+        raise RuntimeError(message)
+    logger.warning(message)
@@ -8,6 +8,10 @@ class CustomBase:
     id: Any
     __name__: str
 
+    # Load server-generated values (created_at, updated_at, ...) with RETURNING
+    # during flush instead of expiring them and selecting them again later
+    __mapper_args__ = {"eager_defaults": True}
+
     @declared_attr
     def __tablename__(cls) -> str:
         import re
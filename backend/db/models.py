@@ -1,9 +1,11 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Enum as SQLEnum, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, Numeric, Date, DateTime, Enum as SQLEnum, ForeignKey, Boolean, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum 
 
 from .base_class import Base 
+from schemas.money import MONEY_PRECISION, MONEY_SCALE
 from schemas.transaction import TransactionType as TransactionTypeEnum
 
 class User(Base):
@@ -13,6 +15,8 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
+    # Bumped by every account/transaction write; the basis of list ETags
+    data_version = Column(BigInteger, server_default="0", nullable=False)
 
     accounts = relationship("Account", back_populates="owner", cascade="all, delete-orphan")
     transactions = relationship("Transaction", back_populates="owner", cascade="all, delete-orphan")
@@ -21,15 +25,17 @@ class Account(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True, nullable=False)
     type = Column(String, nullable=False) 
-    balance = Column(Float, default=0.0, nullable=False)
+    balance = Column(Numeric(MONEY_PRECISION, MONEY_SCALE), default=0, nullable=False)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
     owner = relationship("User", back_populates="accounts")
     transactions = relationship("Transaction", back_populates="account", cascade="all, delete-orphan")
 
 class Transaction(Base):
+    # Optionally range-partitioned by month on `date` (see db/partitioning.py),
+    # in which case the database primary key is (id, date)
     id = Column(Integer, primary_key=True, index=True)
-    amount = Column(Float, nullable=False)
+    amount = Column(Numeric(MONEY_PRECISION, MONEY_SCALE), nullable=False)
     type = Column(SQLEnum(TransactionTypeEnum, name="transaction_type_enum"), nullable=False, index=True)
     category = Column(String, index=True, nullable=True) 
     date = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
@@ -42,3 +48,70 @@ class Transaction(Base):
 
     account = relationship("Account", back_populates="transactions")
     owner = relationship("User", back_populates="transactions")
+
+    __table_args__ = (
+        # Serves the owner-scoped, newest-first listing and its keyset pagination
+        Index("ix_transactions_owner_date_id", "owner_id", date.desc(), id.desc()),
+        # Serves the known-category filter, which ignores case and surrounding spaces
+        Index("ix_transactions_category_normalized", func.lower(func.btrim(category))),
+        # Trigram GIN indexes (pg_trgm) let the ILIKE '%term%' search filters skip full scans
+        Index("ix_transactions_category_trgm", "category", postgresql_using="gin", postgresql_ops={"category": "gin_trgm_ops"}),
+        Index("ix_transactions_description_trgm", "description", postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"}),
+    )
+
+class AccountBalanceSnapshot(Base):
+    """
+    Per-account, per-month ledger of balance movements, kept up to date in the
+    same DB transaction as every transaction write. The sum of
+    `net_change + adjustment` over an account's rows equals its balance.
+    """
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False)
+    month = Column(Date, nullable=False) # First day of the month (UTC)
+    net_change = Column(Numeric(MONEY_PRECISION, MONEY_SCALE), default=0, nullable=False) # Signed sum of the month's transactions
+    adjustment = Column(Numeric(MONEY_PRECISION, MONEY_SCALE), default=0, nullable=False) # Opening balance and direct balance edits
+    transaction_count = Column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("account_id", "month", name="uq_account_balance_snapshots_account_month"),
+    )
+
+class MonthlyRollup(Base):
+    """
+    Per-owner totals of transactions by account, month, type and category, kept
+    up to date in the same DB transaction as every transaction write, so monthly
+    and yearly reports read a few rows instead of scanning transactions.
+    """
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    account_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False)
+    month = Column(Date, nullable=False) # First day of the month (UTC)
+    type = Column(SQLEnum(TransactionTypeEnum, name="transaction_type_enum"), nullable=False)
+    category = Column(String, nullable=True)
+    total = Column(Numeric(MONEY_PRECISION, MONEY_SCALE), default=0, nullable=False) # Sum of amounts (unsigned)
+    transaction_count = Column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        # Leading owner_id/month also serves the owner-scoped month range reads
+        UniqueConstraint(
+            "owner_id", "month", "account_id", "type", "category",
+            name="uq_monthly_rollups_key", postgresql_nulls_not_distinct=True,
+        ),
+    )
+
+class IdempotencyKey(Base):
+    """
+    Stored responses of writes made with an `Idempotency-Key` header, so a retried
+    request gets the original response instead of being applied a second time.
+    """
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False) # SHA-256 of method, path and body
+    status_code = Column(Integer, nullable=False)
+    response = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("owner_id", "key", name="uq_idempotency_keys_owner_key"),
+    )
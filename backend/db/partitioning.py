@@ -0,0 +1,169 @@
+"""
+Optional monthly range partitioning of the `transactions` table on `date`.
+
+Partitioning is opt-in per database: `python manage.py partitions convert`
+rebuilds the table as a partitioned one (one partition per UTC month plus a
+DEFAULT partition for anything outside the created ranges). Afterwards,
+future months are created ahead of time at startup (DB_PARTITION_MONTHS_AHEAD)
+or with `python manage.py partitions create`.
+
+The ORM model is unchanged; only the database primary key becomes (id, date),
+since Postgres requires the partition key in it. Queries that filter on
+`transactions.date` with plain comparisons (the listing/summary filters and
+the keyset cursor) get partition pruning.
+"""
+import logging
+from datetime import date, datetime, timezone
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+TABLE = "transactions"
+DEFAULT_PARTITION = f"{TABLE}_default"
+UNPARTITIONED_TABLE = f"{TABLE}_unpartitioned"
+
+# Serializes partition DDL across workers starting at the same time
+_PARTITION_LOCK_KEY = 0x7472616E73 # "trans"
+
+# Same columns and constraints as db.models.Transaction, except for the primary key
+_CREATE_PARTITIONED_TABLE = f"""
+CREATE TABLE {TABLE} (
+    id INTEGER NOT NULL DEFAULT nextval('transactions_id_seq'),
+    amount NUMERIC(14, 2) NOT NULL,
+    type transaction_type_enum NOT NULL,
+    category VARCHAR,
+    date TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    description VARCHAR,
+    account_id INTEGER NOT NULL REFERENCES accounts (id),
+    owner_id INTEGER NOT NULL REFERENCES users (id),
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    CONSTRAINT transactions_pkey PRIMARY KEY (id, date)
+) PARTITION BY RANGE (date)
+"""
+
+# Indexes from db.models.Transaction, created on the parent so every partition gets them
+_PARTITIONED_INDEXES = [
+    f"CREATE INDEX ix_transactions_id ON {TABLE} (id)",
+    f"CREATE INDEX ix_transactions_type ON {TABLE} (type)",
+    f"CREATE INDEX ix_transactions_category ON {TABLE} (category)",
+    f"CREATE INDEX ix_transactions_date ON {TABLE} (date)",
+    f"CREATE INDEX ix_transactions_owner_date_id ON {TABLE} (owner_id, date DESC, id DESC)",
+    f"CREATE INDEX ix_transactions_category_normalized ON {TABLE} (lower(btrim(category)))",
+    f"CREATE INDEX ix_transactions_category_trgm ON {TABLE} USING gin (category gin_trgm_ops)",
+    f"CREATE INDEX ix_transactions_description_trgm ON {TABLE} USING gin (description gin_trgm_ops)",
+]
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def _partition_name(month: date) -> str:
+    return f"{TABLE}_y{month.year:04d}m{month.month:02d}"
+
+def _bound(month: date) -> str:
+    return f"'{month.isoformat()} 00:00:00+00'"
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    result = await conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :table AND c.relnamespace = to_regnamespace(current_schema()))"
+    ), {"table": TABLE})
+    return result.scalar_one()
+
+async def _existing_partitions(conn: AsyncConnection) -> set:
+    result = await conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table AND p.relnamespace = to_regnamespace(current_schema())"
+    ), {"table": TABLE})
+    return set(result.scalars().all())
+
+async def ensure_partitions(conn: AsyncConnection, *, first_month: date, last_month: date) -> List[str]:
+    """
+    Create the monthly partitions from `first_month` to `last_month` (inclusive)
+    that don't exist yet, moving any rows for those months out of the DEFAULT
+    partition first. Runs in the caller's transaction; returns the created names.
+    """
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _PARTITION_LOCK_KEY})
+    existing = await _existing_partitions(conn)
+    created = []
+    month = first_month.replace(day=1)
+    while month <= last_month:
+        name = _partition_name(month)
+        if name not in existing:
+            lower, upper = _bound(month), _bound(_add_months(month, 1))
+            await conn.execute(text(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+            if DEFAULT_PARTITION in existing:
+                await conn.execute(text(
+                    f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE date >= {lower} AND date < {upper} RETURNING *) "
+                    f"INSERT INTO {name} SELECT * FROM moved"
+                ))
+            await conn.execute(text(f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM ({lower}) TO ({upper})"))
+            created.append(name)
+        month = _add_months(month, 1)
+    return created
+
+async def create_future_partitions(engine: AsyncEngine, *, months_ahead: int) -> List[str]:
+    """
+    Make sure partitions exist from the current month through `months_ahead`
+    months from now. A no-op (one catalog query) when the table is not
+    partitioned or the partitions already exist.
+    """
+    current_month = datetime.now(timezone.utc).date().replace(day=1)
+    async with engine.begin() as conn:
+        if not await is_partitioned(conn):
+            return []
+        created = await ensure_partitions(
+            conn, first_month=current_month, last_month=_add_months(current_month, months_ahead)
+        )
+    if created:
+        logger.info(f"Created transaction partitions: {', '.join(created)}")
+    return created
+
+async def convert_to_partitioned(engine: AsyncEngine, *, months_ahead: int) -> List[str]:
+    """
+    Rebuild `transactions` as a table partitioned by month, copying every row.
+    Runs in one transaction holding an ACCESS EXCLUSIVE lock on the table, so
+    transaction reads and writes wait until it finishes; schedule it accordingly.
+    """
+    async with engine.begin() as conn:
+        if await is_partitioned(conn):
+            raise RuntimeError(f"{TABLE} is already partitioned.")
+
+        await conn.execute(text(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE"))
+        first_date = (await conn.execute(text(
+            f"SELECT min(date AT TIME ZONE 'UTC')::date FROM {TABLE}"
+        ))).scalar_one()
+
+        # Keep the id sequence (and the pkey name) for the new table
+        await conn.execute(text("ALTER SEQUENCE transactions_id_seq OWNED BY NONE"))
+        await conn.execute(text(f"ALTER TABLE {TABLE} RENAME TO {UNPARTITIONED_TABLE}"))
+        await conn.execute(text(f"ALTER TABLE {UNPARTITIONED_TABLE} RENAME CONSTRAINT transactions_pkey TO {UNPARTITIONED_TABLE}_pkey"))
+        await conn.execute(text(_CREATE_PARTITIONED_TABLE))
+        await conn.execute(text("ALTER SEQUENCE transactions_id_seq OWNED BY transactions.id"))
+        await conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"))
+
+        current_month = datetime.now(timezone.utc).date().replace(day=1)
+        created = await ensure_partitions(
+            conn,
+            first_month=first_date or current_month,
+            last_month=_add_months(current_month, months_ahead),
+        )
+
+        await conn.execute(text(
+            f"INSERT INTO {TABLE} (id, amount, type, category, date, description, account_id, owner_id, created_at, updated_at) "
+            f"SELECT id, amount, type, category, date, description, account_id, owner_id, created_at, updated_at "
+            f"FROM {UNPARTITIONED_TABLE}"
+        ))
+        await conn.execute(text(f"DROP TABLE {UNPARTITIONED_TABLE}"))
+        # Built after the copy, which is much faster than maintaining them row by row
+        for statement in _PARTITIONED_INDEXES:
+            await conn.execute(text(statement))
+        await conn.execute(text(f"ANALYZE {TABLE}"))
+
+    logger.info(f"Partitioned {TABLE} into {len(created)} monthly partitions")
+    return created
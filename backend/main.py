@@ -1,12 +1,19 @@
 import logging
-from fastapi import FastAPI
+import secrets
+from datetime import timedelta
+from typing import Annotated, Optional
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 
 from api import api_router
+from core import security
 from core.config import settings
-from db.base import init_db
+from db import partitioning
+from db.base import check_db_revision, engine, pool_stats, replica_engines
 from db.models import *
+from services import nlp_cache, nlp_parser, ollama, rule_parser
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -15,13 +22,15 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown events."""
     # Startup
-    logger.info("Starting up application and initializing database...")
-    await init_db()
-    logger.info("Database initialization complete.")
+    logger.info("Starting up application and checking database schema...")
+    await check_db_revision()
+    if settings.DB_PARTITION_MONTHS_AHEAD >= 0:
+        await partitioning.create_future_partitions(engine, months_ahead=settings.DB_PARTITION_MONTHS_AHEAD)
+    await ollama.start_client()
     yield
     # Shutdown
     logger.info("Shutting down application...")
-    # Add any shutdown logic here if needed
+    await ollama.close_client()
     logger.info("Application shutdown complete.")
 
 app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
@@ -36,6 +45,7 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"], # Allow all standard methods
         allow_headers=["*"], # Allow all headers
+        expose_headers=["X-Next-Cursor", "X-Parse-Source", "Idempotent-Replayed", "ETag", "X-Read-Your-Writes"], # Pagination cursor, NLP parse path, idempotent replays, list versions, replica read pin
     )
 else:
      logger.info("No CORS origins specified. Skipping CORS middleware setup.")
@@ -43,9 +53,64 @@ else:
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+@app.middleware("http")
+async def read_your_writes_header(request: Request, call_next):
+    """
+    After a request that committed writes for a user, send a signed
+    X-Read-Your-Writes token valid for DB_READ_YOUR_WRITES_SECONDS. Clients echo
+    it on later requests, which keeps their reads on the primary whichever
+    worker or instance serves them.
+    """
+    request.state.primary_session_info = None
+    response = await call_next(request)
+    session_info = request.state.primary_session_info
+    if replica_engines and session_info and session_info.get("committed"):
+        response.headers["X-Read-Your-Writes"] = security.create_read_pin_token(
+            session_info["user_id"], timedelta(seconds=settings.DB_READ_YOUR_WRITES_SECONDS)
+        )
+    return response
+
+@app.exception_handler(security.PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: security.PasswordHasherBusy):
+    """Shed login/registration load instead of queueing bcrypt work without limit."""
+    logger.warning(f"Rejected {request.method} {request.url.path}: {exc}")
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "The server is busy. Please try again shortly."},
+        headers={"Retry-After": "2"},
+    )
+
 # Root endpoint
 @app.get("/", tags=["Root"])
 async def root():
     """Simple root endpoint to check if the API is running."""
     logger.info("Root endpoint accessed.")
     return {"message": f"Welcome to the {settings.PROJECT_NAME} API!"}
+
+def require_metrics_token(authorization: Annotated[Optional[str], Header()] = None):
+    """
+    The counters describe pool sizes and queue depths, which help an attacker
+    time load against the service, so /metrics answers 404 unless METRICS_TOKEN
+    is set and 401 unless the request sends it as a bearer token.
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    expected = f"Bearer {settings.METRICS_TOKEN}".encode()
+    if authorization is None or not secrets.compare_digest(authorization.encode(), expected):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+@app.get("/metrics", tags=["Root"], include_in_schema=False, dependencies=[Depends(require_metrics_token)])
+async def metrics():
+    """Runtime counters for caches and pools in this worker; requires METRICS_TOKEN (see require_metrics_token)."""
+    return {
+        "nlp_cache": nlp_cache.parse_cache.stats() if nlp_cache.parse_cache else None,
+        "nlp_rule_parser": rule_parser.stats,
+        "nlp_batcher": nlp_parser.batcher_stats(),
+        "ollama_admission": ollama.admission.stats(),
+        "password_hashing": security.hash_stats(),
+        "db_pool": pool_stats(),
+    }
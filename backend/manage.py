@@ -0,0 +1,144 @@
+"""
+Operational commands for the backend.
+
+    python manage.py migrate upgrade [revision]    # default: head
+    python manage.py migrate downgrade <revision>
+    python manage.py migrate current
+    python manage.py migrate history
+    python manage.py migrate stamp <revision>
+    python manage.py migrate revision -m "message" [--autogenerate]
+    python manage.py rollups backfill [--owner-id ID]
+    python manage.py partitions convert [--months-ahead N]
+    python manage.py partitions create [--months-ahead N]
+    python manage.py idempotency purge
+"""
+import argparse
+import asyncio
+import sys
+
+from alembic import command
+
+import crud
+from core.config import settings
+from db import partitioning
+from db.base import alembic_config, engine, AsyncSessionFactory
+
+
+def migrate(args: argparse.Namespace):
+    config = alembic_config()
+    if args.action == "upgrade":
+        command.upgrade(config, args.revision, sql=args.sql)
+    elif args.action == "downgrade":
+        command.downgrade(config, args.revision, sql=args.sql)
+    elif args.action == "current":
+        command.current(config, verbose=True)
+    elif args.action == "history":
+        command.history(config, indicate_current=True)
+    elif args.action == "stamp":
+        command.stamp(config, args.revision)
+    elif args.action == "revision":
+        command.revision(config, message=args.message, autogenerate=args.autogenerate)
+
+
+async def _backfill_rollups(owner_id: int | None):
+    try:
+        async with AsyncSessionFactory() as db:
+            await crud.rollup.rebuild(db, owner_id=owner_id)
+            await db.commit()
+    finally:
+        await engine.dispose()
+
+
+def rollups(args: argparse.Namespace):
+    if args.action == "backfill":
+        asyncio.run(_backfill_rollups(args.owner_id))
+        print(f"Rebuilt monthly rollups for {'owner ' + str(args.owner_id) if args.owner_id is not None else 'all owners'}.")
+
+
+async def _run_partitioning(action: str, months_ahead: int):
+    try:
+        if action == "convert":
+            return await partitioning.convert_to_partitioned(engine, months_ahead=months_ahead)
+        return await partitioning.create_future_partitions(engine, months_ahead=months_ahead)
+    finally:
+        await engine.dispose()
+
+
+def partitions(args: argparse.Namespace):
+    created = asyncio.run(_run_partitioning(args.action, args.months_ahead))
+    print(f"Created {len(created)} partition(s){': ' + ', '.join(created) if created else ''}.")
+
+
+async def _purge_idempotency_keys() -> int:
+    try:
+        async with AsyncSessionFactory() as db:
+            removed = await crud.idempotency.purge_expired(db)
+            await db.commit()
+            return removed
+    finally:
+        await engine.dispose()
+
+
+def idempotency(args: argparse.Namespace):
+    if args.action == "purge":
+        removed = asyncio.run(_purge_idempotency_keys())
+        print(f"Removed {removed} expired idempotency key(s).")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="manage.py", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = commands.add_parser("migrate", help="Apply or inspect schema migrations")
+    migrate_parser.set_defaults(func=migrate)
+    actions = migrate_parser.add_subparsers(dest="action", required=True)
+
+    upgrade = actions.add_parser("upgrade", help="Upgrade the schema (default: to head)")
+    upgrade.add_argument("revision", nargs="?", default="head")
+    upgrade.add_argument("--sql", action="store_true", help="Print the SQL instead of running it")
+
+    downgrade = actions.add_parser("downgrade", help="Revert the schema to a revision")
+    downgrade.add_argument("revision")
+    downgrade.add_argument("--sql", action="store_true", help="Print the SQL instead of running it")
+
+    actions.add_parser("current", help="Show the database's revision")
+    actions.add_parser("history", help="List revisions")
+
+    stamp = actions.add_parser("stamp", help="Record a revision without running migrations")
+    stamp.add_argument("revision")
+
+    revision = actions.add_parser("revision", help="Create a new revision file")
+    revision.add_argument("-m", "--message", required=True)
+    revision.add_argument("--autogenerate", action="store_true", help="Diff db/models.py against the database")
+
+    rollups_parser = commands.add_parser("rollups", help="Maintain the monthly transaction rollups")
+    rollups_parser.set_defaults(func=rollups)
+    rollup_actions = rollups_parser.add_subparsers(dest="action", required=True)
+
+    backfill = rollup_actions.add_parser("backfill", help="Rebuild rollups from the transactions table")
+    backfill.add_argument("--owner-id", type=int, help="Only rebuild this user's rollups")
+
+    partitions_parser = commands.add_parser("partitions", help="Monthly range partitioning of transactions")
+    partitions_parser.set_defaults(func=partitions)
+    partition_actions = partitions_parser.add_subparsers(dest="action", required=True)
+
+    convert = partition_actions.add_parser("convert", help="Rebuild transactions as a partitioned table (locks it while copying)")
+    create = partition_actions.add_parser("create", help="Create missing partitions up to --months-ahead")
+    for partition_parser in (convert, create):
+        partition_parser.add_argument("--months-ahead", type=int, default=max(settings.DB_PARTITION_MONTHS_AHEAD, 0))
+
+    idempotency_parser = commands.add_parser("idempotency", help="Maintain stored Idempotency-Key responses")
+    idempotency_parser.set_defaults(func=idempotency)
+    idempotency_actions = idempotency_parser.add_subparsers(dest="action", required=True)
+    idempotency_actions.add_parser("purge", help="Delete keys older than IDEMPOTENCY_KEY_TTL_HOURS")
+
+    return parser
+
+
+def main(argv: list[str] | None = None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+Matches db/models.py as of the switch from `create_all` at startup to
+migrations. Every step is conditional so databases created by the old
+startup DDL can be upgraded in place: missing tables and indexes are
+created, and money columns that are still double precision are converted
+to NUMERIC(14, 2).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONEY = sa.Numeric(14, 2)
+
+# Created explicitly (checkfirst) rather than as a side effect of create_table
+transaction_type_enum = postgresql.ENUM(
+    "INCOME", "EXPENSE", "TRANSFER", name="transaction_type_enum", create_type=False
+)
+
+MONEY_COLUMNS = [
+    ("accounts", "balance"),
+    ("transactions", "amount"),
+    ("account_balance_snapshots", "net_change"),
+    ("account_balance_snapshots", "adjustment"),
+]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    transaction_type_enum.create(bind, checkfirst=True)
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("first_name", sa.String(), nullable=False),
+        sa.Column("last_name", sa.String(), nullable=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_users_id", "users", ["id"], if_not_exists=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True, if_not_exists=True)
+
+    op.create_table(
+        "accounts",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("balance", MONEY, nullable=False),
+        sa.Column("owner_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_accounts_id", "accounts", ["id"], if_not_exists=True)
+    op.create_index("ix_accounts_name", "accounts", ["name"], if_not_exists=True)
+
+    op.create_table(
+        "transactions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("amount", MONEY, nullable=False),
+        sa.Column("type", transaction_type_enum, nullable=False),
+        sa.Column("category", sa.String(), nullable=True),
+        sa.Column("date", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column("owner_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.ForeignKeyConstraint(["account_id"], ["accounts.id"]),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_transactions_id", "transactions", ["id"], if_not_exists=True)
+    op.create_index("ix_transactions_type", "transactions", ["type"], if_not_exists=True)
+    op.create_index("ix_transactions_category", "transactions", ["category"], if_not_exists=True)
+    op.create_index("ix_transactions_date", "transactions", ["date"], if_not_exists=True)
+    op.create_index(
+        "ix_transactions_owner_date_id",
+        "transactions",
+        ["owner_id", sa.text("date DESC"), sa.text("id DESC")],
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "account_balance_snapshots",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column("net_change", MONEY, nullable=False),
+        sa.Column("adjustment", MONEY, nullable=False),
+        sa.Column("transaction_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["account_id"], ["accounts.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("account_id", "month", name="uq_account_balance_snapshots_account_month"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_account_balance_snapshots_id", "account_balance_snapshots", ["id"], if_not_exists=True)
+
+    # Databases from before exact decimals still store money as double precision
+    inspector = sa.inspect(bind)
+    for table, column in MONEY_COLUMNS:
+        column_types = {c["name"]: c["type"] for c in inspector.get_columns(table)}
+        if isinstance(column_types[column], sa.Float):
+            op.alter_column(
+                table,
+                column,
+                type_=MONEY,
+                postgresql_using=f"round({column}::numeric, 2)",
+            )
+
+
+def downgrade() -> None:
+    op.drop_table("account_balance_snapshots")
+    op.drop_table("transactions")
+    op.drop_table("accounts")
+    op.drop_table("users")
+    transaction_type_enum.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,50 @@
+"""trigram indexes for transaction search
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:01
+
+GIN pg_trgm indexes on transactions.category and transactions.description,
+so `ILIKE '%term%'` filters (the `category` and `q` parameters of
+GET /transactions/) use an index instead of scanning the owner's rows.
+The indexes are built CONCURRENTLY to keep the table writable meanwhile.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_transactions_category_trgm",
+            "transactions",
+            ["category"],
+            postgresql_using="gin",
+            postgresql_ops={"category": "gin_trgm_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_transactions_description_trgm",
+            "transactions",
+            ["description"],
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_transactions_description_trgm", table_name="transactions", postgresql_concurrently=True, if_exists=True)
+        op.drop_index("ix_transactions_category_trgm", table_name="transactions", postgresql_concurrently=True, if_exists=True)
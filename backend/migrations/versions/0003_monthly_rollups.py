@@ -0,0 +1,62 @@
+"""monthly rollups
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:02
+
+Adds monthly_rollups and fills it from the existing transactions in the same
+migration transaction, so it is complete before the application starts writing
+increments to it. `python manage.py rollups backfill` repeats the fill later
+if it ever needs repairing.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+transaction_type_enum = postgresql.ENUM(
+    "INCOME", "EXPENSE", "TRANSFER", name="transaction_type_enum", create_type=False
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "monthly_rollups",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("owner_id", sa.Integer(), nullable=False),
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column("type", transaction_type_enum, nullable=False),
+        sa.Column("category", sa.String(), nullable=True),
+        sa.Column("total", sa.Numeric(14, 2), nullable=False),
+        sa.Column("transaction_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["account_id"], ["accounts.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "owner_id", "month", "account_id", "type", "category",
+            name="uq_monthly_rollups_key", postgresql_nulls_not_distinct=True,
+        ),
+    )
+    op.create_index("ix_monthly_rollups_id", "monthly_rollups", ["id"])
+    op.execute(
+        """
+        INSERT INTO monthly_rollups (owner_id, account_id, month, type, category, total, transaction_count)
+        SELECT owner_id, account_id, CAST(date_trunc('month', timezone('UTC', date)) AS DATE),
+               type, category, sum(amount), count(id)
+        FROM transactions
+        GROUP BY owner_id, account_id, date_trunc('month', timezone('UTC', date)), type, category
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("monthly_rollups")
@@ -0,0 +1,46 @@
+"""normalized category index
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:05
+
+Expression index on lower(btrim(transactions.category)) for the known-category
+filter of GET /transactions/, which matches regardless of case and surrounding
+spaces since categories are stored as written. Built CONCURRENTLY to keep the
+table writable meanwhile, except on a partitioned table, where Postgres
+only supports building it in one go.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _is_partitioned() -> bool:
+    return op.get_bind().execute(sa.text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('transactions'))"
+    )).scalar_one()
+
+
+def upgrade() -> None:
+    concurrently = not _is_partitioned()
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_transactions_category_normalized",
+            "transactions",
+            [sa.text("lower(btrim(category))")],
+            postgresql_concurrently=concurrently,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_transactions_category_normalized", table_name="transactions", postgresql_concurrently=True, if_exists=True)
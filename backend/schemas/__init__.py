@@ -1,3 +1,4 @@
+from .money import *
 from .account import *
 from .token import *
 from .transaction import *
@@ -1,11 +1,14 @@
+from datetime import date
 from pydantic import BaseModel, Field
 from typing import Optional
 
+from .money import Money
+
 class AccountBase(BaseModel):
     """Base schema for financial accounts."""
     name: str = Field(..., description="Name of the account (e.g., 'HDFC Savings', 'Cash Wallet')")
     type: str = Field(..., description="Type of account (e.g., 'Bank', 'Credit Card', 'Cash', 'Investment')")
-    balance: float = Field(default=0.0, description="Current balance of the account")
+    balance: Money = Field(default=0, description="Current balance of the account")
 
     model_config = {
         "from_attributes": True
@@ -19,9 +22,19 @@ class AccountUpdate(BaseModel):
     """Schema for updating an account (all fields optional)."""
     name: str | None = None
     type: str | None = None
-    balance: float | None = None
+    balance: Money | None = None
 
 class Account(AccountBase):
     """Schema representing an account returned by the API."""
     id: int
     owner_id: int
+
+class AccountReconciliation(BaseModel):
+    """Result of checking an account balance against its ledger."""
+    account_id: int
+    balance: Money = Field(..., description="Balance stored on the account")
+    ledger_balance: Money = Field(..., description="Balance implied by the monthly ledger snapshots")
+    snapshot_month: date | None = Field(None, description="Most recent ledger month that was re-checked against transactions")
+    snapshot_net_change: Money = Field(0, description="Net change recorded in the ledger since snapshot_month")
+    recomputed_net_change: Money = Field(0, description="Net change recomputed from transactions since snapshot_month")
+    in_sync: bool
@@ -0,0 +1,39 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Annotated, Any
+
+from pydantic import BeforeValidator, Field, PlainSerializer, TypeAdapter, ValidationError
+
+# Matches the NUMERIC(14, 2) money columns in db/models.py
+MONEY_PRECISION = 14
+MONEY_SCALE = 2
+MONEY_QUANTUM = Decimal(1).scaleb(-MONEY_SCALE)
+MONEY_LIMIT = Decimal(10) ** (MONEY_PRECISION - MONEY_SCALE)
+
+def quantize_money(value: Decimal) -> Decimal:
+    """Round an amount to whole minor units (paise/cents)."""
+    return value.quantize(MONEY_QUANTUM, rounding=ROUND_HALF_UP)
+
+_DECIMAL = TypeAdapter(Decimal)
+
+def _quantize_input(value: Any) -> Any:
+    """
+    Round an incoming amount before the bound checks run, so they judge the value
+    that is stored: 0.004 is not > 0, and 999999999999.995 does not fit NUMERIC(14, 2).
+    Input that is not a finite decimal within range is passed on for the Decimal
+    schema and the bounds to reject with their usual errors.
+    """
+    try:
+        amount = _DECIMAL.validate_python(value)
+    except ValidationError:
+        return value
+    return quantize_money(amount) if abs(amount) < MONEY_LIMIT else amount
+
+# Exact monetary amount. Validated and computed as a Decimal, rounded to minor
+# units, and sent to clients as a plain JSON number. Field-level bounds such as
+# `gt=0` apply to the rounded value.
+Money = Annotated[
+    Decimal,
+    Field(gt=-MONEY_LIMIT, lt=MONEY_LIMIT),
+    BeforeValidator(_quantize_input),
+    PlainSerializer(float, return_type=float, when_used="json"),
+]
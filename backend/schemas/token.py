@@ -9,3 +9,4 @@ class Token(BaseModel):
 class TokenPayload(BaseModel):
     """Schema for the data encoded within a JWT token."""
     sub: str | None = None
+    uid: int | None = None
@@ -1,16 +1,25 @@
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from pydantic import BaseModel, Field, validator
 from enum import Enum
 
+from .money import Money
+
 class TransactionType(str, Enum):
     """Enum for transaction types."""
     INCOME = 'INCOME'
     EXPENSE = 'EXPENSE'
     TRANSFER = 'TRANSFER'
 
+# Categories the NLP parsers assign; also what the category filter matches exactly
+KNOWN_CATEGORIES = [
+    "Groceries", "Dining", "Transport", "Utilities", "Rent/Mortgage",
+    "Salary", "Freelance", "Gift", "Shopping", "Entertainment", "Travel",
+    "Healthcare", "Education", "Investment", "Other Income", "Other Expense"
+]
+
 class TransactionBase(BaseModel):
     """Base schema for transactions."""
-    amount: float = Field(..., gt=0, description="Transaction amount (must be positive)")
+    amount: Money = Field(..., gt=0, description="Transaction amount (must be positive)")
     category: str | None = Field(None, description="Category of the transaction (e.g., 'Groceries', 'Salary')")
     description: str | None = Field(None, description="Optional description of the transaction")
     date: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), description="Date and time of the transaction")
@@ -25,9 +34,13 @@ class TransactionCreate(TransactionBase):
     """Schema for creating a new transaction."""
     type: TransactionType = Field(..., description="Type of transaction (INCOME or EXPENSE)")
 
+class TransactionBulkCreate(BaseModel):
+    """Schema for creating several transactions in one request."""
+    transactions: list[TransactionCreate] = Field(..., min_length=1, max_length=1000, description="Transactions to create (1-1000)")
+
 class TransactionUpdate(BaseModel):
     """Schema for updating a transaction (all fields optional)."""
-    amount: float | None = Field(None, gt=0)
+    amount: Money | None = Field(None, gt=0)
     category: str | None = None
     description: str | None = None
     date: datetime | None = None
@@ -42,6 +55,52 @@ class Transaction(TransactionBase):
     created_at: datetime
     updated_at: datetime
 
+class TransactionImportError(BaseModel):
+    """A CSV row that could not be imported."""
+    row: int = Field(..., description="1-based data row number in the uploaded file (header excluded)")
+    error: str
+
+class TransactionImportResult(BaseModel):
+    """Outcome of a CSV statement import."""
+    imported: int = Field(..., description="Number of transactions imported")
+    failed: int = Field(..., description="Number of rows skipped because they failed validation")
+    errors: list[TransactionImportError] = Field(default_factory=list, description="Details for the first failed rows")
+
+class SummaryGranularity(str, Enum):
+    """Bucket sizes supported by the transaction summary."""
+    DAY = 'day'
+    WEEK = 'week'
+    MONTH = 'month'
+
+class TransactionSummaryBucket(BaseModel):
+    """Schema for one aggregated bucket returned by the transaction summary."""
+    period: datetime = Field(..., description="Start of the day/week/month this bucket covers")
+    type: TransactionType
+    category: str | None = None
+    total: Money = Field(..., description="Sum of transaction amounts in the bucket")
+    count: int = Field(..., description="Number of transactions in the bucket")
+
+    model_config = {
+        "from_attributes": True
+    }
+
+class TransactionMonthlyRollup(BaseModel):
+    """Schema for one month's totals of a transaction type and category."""
+    month: date = Field(..., description="First day of the month (UTC)")
+    type: TransactionType
+    category: str | None = None
+    total: Money = Field(..., description="Sum of transaction amounts in the month")
+    count: int = Field(..., description="Number of transactions in the month")
+
+    model_config = {
+        "from_attributes": True
+    }
+
+class ExportFormat(str, Enum):
+    """Output formats supported by the transaction export."""
+    CSV = 'csv'
+    NDJSON = 'ndjson'
+
 class NlpInput(BaseModel):
     """Schema for the input text for NLP parsing."""
     text: str = Field(..., description="Natural language text describing the transaction(s)")
@@ -51,7 +110,7 @@ class NlpParsedTransaction(BaseModel):
     Schema matching the expected JSON structure from the LLM.
     This is used for the /parse endpoint response before final confirmation.
     """
-    amount: float = Field(..., gt=0)
+    amount: Money = Field(..., gt=0)
     category: str | None = None
     type: TransactionType
     description: str | None = None
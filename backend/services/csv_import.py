@@ -0,0 +1,154 @@
+import codecs
+import csv
+import io
+import logging
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from datetime import date, timezone
+from decimal import Decimal
+
+from fastapi import UploadFile
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import crud
+from crud.crud_ledger import month_start
+from schemas import TransactionCreate, TransactionType, TransactionImportError, TransactionImportResult
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_SIZE = 64 * 1024
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+async def _iter_records(upload: UploadFile) -> AsyncIterator[str]:
+    """
+    Yield complete CSV records from the upload as it is read chunk by chunk.
+    A record spans several physical lines while it has an open quoted field
+    (odd number of quote characters so far). Lines end only at \r\n, \n or \r,
+    as for the csv module; str.splitlines would also split on form feeds,
+    \u2028 and other characters that may appear inside a field.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    record = ""
+    final = False
+    while not final:
+        chunk = await upload.read(READ_CHUNK_SIZE)
+        final = not chunk
+        pending += decoder.decode(chunk, final=final)
+        lines = io.StringIO(pending, newline="").readlines()
+        pending = lines.pop() if lines and not final and not lines[-1].endswith(("\n", "\r")) else ""
+        for line in lines:
+            record += line
+            if record.count('"') % 2 == 0:
+                yield record
+                record = ""
+    if record:
+        yield record
+
+def _row_to_transaction(row: dict[str, str], account_id: int) -> TransactionCreate:
+    """
+    Validate one CSV row into a TransactionCreate.
+    When the `type` column is missing or empty, the sign of `amount` decides it
+    (negative -> EXPENSE, positive -> INCOME), as most bank statements do.
+    Thousands separators in `amount` are dropped either way, and the target
+    account always wins over an `account_id` column in the file.
+    """
+    data = {key: value for key, value in row.items() if value is not None and value.strip()}
+    if "amount" in data:
+        data["amount"] = data["amount"].replace(",", "").strip()
+    if "type" in data:
+        data["type"] = data["type"].strip().upper()
+    elif "amount" in data:
+        amount = data["amount"]
+        data["type"] = TransactionType.EXPENSE if amount.startswith("-") else TransactionType.INCOME
+        data["amount"] = amount.lstrip("+-")
+    data["account_id"] = account_id
+    return TransactionCreate(**data)
+
+def _format_validation_error(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors())
+
+async def import_transactions_csv(
+    db: AsyncSession, *, upload: UploadFile, account_id: int, owner_id: int
+) -> TransactionImportResult:
+    """
+    Import a CSV statement into one account.
+
+    Expected header columns: `date`, `amount`, and optionally `type`, `category`,
+    `description` (case-insensitive). Rows are validated with TransactionCreate and
+    loaded in batches with COPY; invalid rows are reported and skipped. The account
+    balance, ledger and monthly rollups are updated once with the net effect of all imported rows
+    and everything is committed together. Account ownership must be checked by the caller.
+    """
+    imported = 0
+    failed = 0
+    errors: list[TransactionImportError] = []
+    batch: list[tuple] = []
+    balance_delta = Decimal(0)
+    monthly_movements: dict[date, list] = defaultdict(lambda: [Decimal(0), 0])
+    rollup_movements: dict[tuple, list] = defaultdict(lambda: [Decimal(0), 0])
+    header: list[str] | None = None
+    row_number = 0
+
+    async for record in _iter_records(upload):
+        values = next(csv.reader([record]), [])
+        if not any(value.strip() for value in values):
+            continue
+        if header is None:
+            header = [value.strip().lower() for value in values]
+            continue
+
+        row_number += 1
+        try:
+            transaction_in = _row_to_transaction(dict(zip(header, values)), account_id)
+        except ValidationError as e:
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(TransactionImportError(row=row_number, error=_format_validation_error(e)))
+            continue
+
+        transaction_date = transaction_in.date
+        if transaction_date.tzinfo is None:
+            transaction_date = transaction_date.replace(tzinfo=timezone.utc)
+        batch.append((
+            transaction_in.amount,
+            transaction_in.type,
+            transaction_in.category,
+            transaction_date,
+            transaction_in.description,
+            account_id,
+            owner_id,
+        ))
+        amount_effect = transaction_in.amount if transaction_in.type == TransactionType.INCOME else -transaction_in.amount
+        balance_delta += amount_effect
+        movement = monthly_movements[month_start(transaction_date)]
+        movement[0] += amount_effect
+        movement[1] += 1
+        rollup_movement = rollup_movements[(month_start(transaction_date), transaction_in.type, transaction_in.category)]
+        rollup_movement[0] += transaction_in.amount
+        rollup_movement[1] += 1
+
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await crud.transaction.copy_records(db=db, records=batch)
+            imported += len(batch)
+            batch = []
+
+    await crud.transaction.copy_records(db=db, records=batch)
+    imported += len(batch)
+
+    if imported:
+        await crud.account.apply_balance_deltas(db=db, deltas={account_id: balance_delta})
+        await crud.ledger.record(db, movements=[
+            (account_id, month, net_change, count) for month, (net_change, count) in monthly_movements.items()
+        ])
+        await crud.rollup.record(db, movements=[
+            (owner_id, account_id, month, transaction_type, category, total, count)
+            for (month, transaction_type, category), (total, count) in rollup_movements.items()
+        ])
+        await crud.user.bump_data_version(db, id=owner_id)
+    await db.commit()
+
+    logger.info(f"Imported {imported} transactions into account {account_id} ({failed} rows failed validation)")
+    return TransactionImportResult(imported=imported, failed=failed, errors=errors)
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Generic, Hashable, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+class ParseBatcher(Generic[T, R]):
+    """
+    Groups concurrent requests into batches.
+
+    Requests submitted under the same group key within `window_seconds` of the first
+    one (or until `max_batch` are waiting) are handed to `run_batch` together, which
+    must return one result per item in order. Items it returns None for are retried
+    one by one with `run_single`; a batch of one goes straight to `run_single`.
+    """
+    def __init__(
+        self,
+        *,
+        run_single: Callable[[T], Awaitable[Optional[R]]],
+        run_batch: Callable[[List[T]], Awaitable[List[Optional[R]]]],
+        window_seconds: float,
+        max_batch: int,
+    ):
+        self.run_single = run_single
+        self.run_batch = run_batch
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self._pending: dict[Hashable, List[tuple[T, asyncio.Future]]] = {}
+        self._timers: dict[Hashable, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self.batches = 0
+        self.batched_items = 0
+        self.fallbacks = 0
+
+    async def submit(self, item: T, *, group: Hashable = None) -> Optional[R]:
+        """Queue `item` and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(group, [])
+        pending.append((item, future))
+        if len(pending) >= self.max_batch:
+            self._flush(group)
+        elif group not in self._timers:
+            self._timers[group] = loop.call_later(self.window_seconds, self._flush, group)
+        return await future
+
+    def _flush(self, group: Hashable) -> None:
+        timer = self._timers.pop(group, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(group, [])
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[tuple[T, asyncio.Future]]) -> None:
+        items = [item for item, _ in batch]
+        futures = [future for _, future in batch]
+        try:
+            if len(items) == 1:
+                results = [await self.run_single(items[0])]
+            else:
+                self.batches += 1
+                self.batched_items += len(items)
+                results = list(await self.run_batch(items))
+                missing = [index for index, result in enumerate(results) if result is None]
+                if missing:
+                    logger.warning(f"Batched parse did not line up for {len(missing)} of {len(items)} items; retrying them one by one.")
+                    self.fallbacks += len(missing)
+                    retried = await asyncio.gather(
+                        *(self.run_single(items[index]) for index in missing), return_exceptions=True
+                    )
+                    for index, result in zip(missing, retried):
+                        results[index] = result
+        except Exception as e:
+            results = [e] * len(items)
+
+        for future, result in zip(futures, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "batched_items": self.batched_items,
+            "fallbacks": self.fallbacks,
+            "window_ms": self.window_seconds * 1000,
+            "max_batch": self.max_batch,
+        }
@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from typing import List, Protocol
+
+from pydantic import TypeAdapter
+
+from core.cache import TTLCache
+from core.config import settings
+from schemas import NlpParsedTransaction
+
+logger = logging.getLogger(__name__)
+
+_transactions_adapter = TypeAdapter(List[NlpParsedTransaction])
+
+class CacheBackend(Protocol):
+    """Storage for serialized parse results, keyed by `ParseCache.make_key`."""
+    name: str
+
+    async def get(self, key: str) -> str | None: ...
+
+    async def set(self, key: str, value: str) -> None: ...
+
+    async def delete(self, key: str) -> None: ...
+
+class MemoryCacheBackend:
+    """Per-process LRU backend (the default)."""
+    name = "memory"
+
+    def __init__(self, *, max_entries: int, ttl_seconds: int):
+        self._entries: TTLCache[str, str] = TTLCache(maxsize=max_entries, ttl=ttl_seconds)
+
+    async def get(self, key: str) -> str | None:
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: str) -> None:
+        self._entries.set(key, value)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key)
+
+class SQLiteCacheBackend:
+    """
+    On-disk backend stored in a SQLite file. Survives restarts and is shared by
+    all workers on the same host. Queries run in a worker thread.
+    """
+    name = "sqlite"
+
+    def __init__(self, *, path: str, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS nlp_parse_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_nlp_parse_cache_accessed_at ON nlp_parse_cache (accessed_at)")
+
+    def _get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM nlp_parse_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM nlp_parse_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE nlp_parse_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def _set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO nlp_parse_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl_seconds, now),
+            )
+            self._conn.execute("DELETE FROM nlp_parse_cache WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "DELETE FROM nlp_parse_cache WHERE key IN ("
+                " SELECT key FROM nlp_parse_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM nlp_parse_cache WHERE key = ?", (key,))
+
+    async def get(self, key: str) -> str | None:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: str) -> None:
+        await asyncio.to_thread(self._set, key, value)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._delete, key)
+
+class ParseCache:
+    """
+    Cache of validated NLP parse results in front of the LLM.
+    Backend failures are logged and treated as misses so parsing keeps working.
+    """
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(text: str, *, model: str, prompt_version: str, current_date: str, currency: str) -> str:
+        """
+        Build the cache key. The text is case-folded and whitespace-collapsed so
+        near-identical inputs share an entry; the date is part of the key because
+        the prompt embeds it.
+        """
+        normalized = " ".join(text.casefold().split())
+        raw = "\x1f".join((prompt_version, model, current_date, currency, normalized))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    async def get(self, key: str) -> List[NlpParsedTransaction] | None:
+        try:
+            raw = await self.backend.get(key)
+        except Exception as e:
+            logger.error(f"NLP cache lookup failed: {e}", exc_info=True)
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        try:
+            transactions = _transactions_adapter.validate_json(raw)
+        except ValueError as e:
+            # Corrupt, or written by an incompatible version of the schema
+            logger.warning(f"Discarding unreadable NLP cache entry: {e}")
+            self.misses += 1
+            try:
+                await self.backend.delete(key)
+            except Exception as e:
+                logger.error(f"NLP cache eviction failed: {e}", exc_info=True)
+            return None
+        self.hits += 1
+        return transactions
+
+    async def set(self, key: str, transactions: List[NlpParsedTransaction]) -> None:
+        try:
+            await self.backend.set(key, _transactions_adapter.dump_json(transactions).decode())
+        except Exception as e:
+            logger.error(f"NLP cache store failed: {e}", exc_info=True)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+def _build_parse_cache() -> ParseCache | None:
+    """Create the cache configured by NLP_CACHE_BACKEND ("memory", "sqlite" or "none")."""
+    backend = settings.NLP_CACHE_BACKEND.lower()
+    if backend == "none":
+        return None
+    if backend == "sqlite":
+        return ParseCache(SQLiteCacheBackend(
+            path=settings.NLP_CACHE_SQLITE_PATH,
+            max_entries=settings.NLP_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.NLP_CACHE_TTL_SECONDS,
+        ))
+    if backend != "memory":
+        logger.warning(f"Unknown NLP_CACHE_BACKEND '{settings.NLP_CACHE_BACKEND}', using the in-memory cache.")
+    return ParseCache(MemoryCacheBackend(
+        max_entries=settings.NLP_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.NLP_CACHE_TTL_SECONDS,
+    ))
+
+parse_cache = _build_parse_cache()
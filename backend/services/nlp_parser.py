@@ -2,118 +2,191 @@ import httpx
 import json
 import logging
 from datetime import date
-from typing import List, Any
+from typing import AsyncIterator, List, Any
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 from core.config import settings
 from schemas import NlpParsedTransaction, TransactionType
+from services import ollama
+from services.nlp_batcher import ParseBatcher
+from services.nlp_cache import ParseCache, parse_cache
 
 OLLAMA_BASE_URL = str(settings.OLLAMA_API_URL)
 OLLAMA_MODEL = settings.OLLAMA_MODEL
 
-# Prompt
-PROMPT_TEMPLATE = """
-You are an expert financial assistant. Extract all financial transaction details from the following text.
+# Bump whenever the prompts (PROMPT_TEMPLATE, BATCH_PROMPT_TEMPLATE or the
+# shared text they are built from) change so cached parse results are not reused
+PROMPT_VERSION = "1"
 
-Respond ONLY with a valid JSON array of transaction objects.  If there are multiple transactions, include them all as separate objects in the array.  If there are no transactions, return an empty array.
-Each transaction object should contain:
+# Prompt text shared by the single and batched prompts, so they cannot drift apart
+_TRANSACTION_FIELDS = """Each transaction object should contain:
 - "amount": (float, required, positive number) The transaction amount.
 - "type": (string, required, must be exactly "INCOME" or "EXPENSE") The type of transaction.
 - "category": (string, optional) A relevant category (e.g., "Groceries", "Salary", "Dining", "Transport", "Utilities", "Shopping", "Travel", "Entertainment", "Gift", "Freelance", "Rent/Mortgage", "Healthcare", "Education", "Investment", "Other Income", "Other Expense"). If unsure, use "Other Expense" or "Other Income".
 - "description": (string, optional) A brief description or merchant name if identifiable.
-- "date": (string, format=%Y-%m-%d) The date of the transaction if mentioned, otherwise use current the date.
+- "date": (string, format=%Y-%m-%d) The date of the transaction if mentioned, otherwise use current the date."""
 
-Rules:
-- Infer the 'type' based on keywords (e.g., "spent", "paid", "bought" -> EXPENSE; "received", "got", "salary" -> INCOME).
+_EXTRACTION_RULES = """- Infer the 'type' based on keywords (e.g., "spent", "paid", "bought" -> EXPENSE; "received", "got", "salary" -> INCOME).
 - If currency symbols (e.g., $, £, €, INR, ₹, USD) are present, ignore them for the 'amount'. Return only the numerical value.
 - Extract merchant names or purpose into 'description'.
-- If no category is clear, use "Other Expense" or "Other Income" respectively.
+- If no category is clear, use "Other Expense" or "Other Income" respectively."""
+
+# Left as a format field for PROMPT_TEMPLATE/BATCH_PROMPT_TEMPLATE.format()
+_ASSUMPTIONS = "Assume the currency is INR unless otherwise specified. Today's date is {current_date}."
+
+# Prompt
+PROMPT_TEMPLATE = f"""
+You are an expert financial assistant. Extract all financial transaction details from the following text.
+
+Respond ONLY with a valid JSON array of transaction objects.  If there are multiple transactions, include them all as separate objects in the array.  If there are no transactions, return an empty array.
+{_TRANSACTION_FIELDS}
+
+Rules:
+{_EXTRACTION_RULES}
 - **Crucially:  Identify *all* distinct transactions in the text.  Do not omit any.**
 - Respond *only* with the JSON array, no explanations or surrounding text.
 
-Assume the currency is INR unless otherwise specified. Today's date is {current_date}.
+{_ASSUMPTIONS}
 
-Text: "{user_input}"
+Text: "{{user_input}}"
 
 JSON Output:
 """
 
-KNOWN_CATEGORIES = [
-    "Groceries", "Dining", "Transport", "Utilities", "Rent/Mortgage",
-    "Salary", "Freelance", "Gift", "Shopping", "Entertainment", "Travel",
-    "Healthcare", "Education", "Investment", "Other Income", "Other Expense"
-]
+BATCH_PROMPT_TEMPLATE = f"""
+You are an expert financial assistant. Below are {{count}} numbered texts, each written by a different user. Extract all financial transaction details from each text separately.
 
-async def parse_transaction_nlp(text: str, currency: str = "INR") -> List[NlpParsedTransaction] | None:
-    """
-    Sends text to Ollama for parsing into structured transactions.
-    Handles lists and single transactions, with improved prompt for multiple transaction extraction.
-    """
+Respond ONLY with a valid JSON object. Its keys must be the text numbers ("1", "2", ...), each appearing exactly once, and each value must be a JSON array of the transaction objects found in that text (an empty array if there are none). Never mix transactions from different texts.
+{_TRANSACTION_FIELDS}
+
+Rules:
+{_EXTRACTION_RULES}
+- **Crucially:  Identify *all* distinct transactions in each text.  Do not omit any.**
+- Respond *only* with the JSON object, no explanations or surrounding text.
+
+{_ASSUMPTIONS}
+
+Texts:
+{{numbered_inputs}}
+
+JSON Output:
+"""
+
+def _cache_key(text: str, currency: str, current_date: str) -> str:
+    return ParseCache.make_key(
+        text, model=OLLAMA_MODEL, prompt_version=PROMPT_VERSION, current_date=current_date, currency=currency
+    )
+
+def _build_payload(text: str, currency: str, current_date: str, *, stream: bool = False) -> dict:
+    """Build the /api/generate request body for one input text."""
     prompt = PROMPT_TEMPLATE.format(
         user_input=text,
         currency=currency,
-        current_date=date.today().isoformat()
+        current_date=current_date
     )
-
-    payload = {
+    return {
         "model": OLLAMA_MODEL,
         "prompt": prompt,
         "format": "json",
-        "stream": False
+        "stream": stream
     }
 
+def _clean_json_string(json_string: str) -> str:
+    """Strip markdown code fences the model sometimes wraps around its JSON."""
+    if json_string.startswith("```json"):
+        json_string = json_string[7:]
+    if json_string.endswith("```"):
+        json_string = json_string[:-3]
+    return json_string.strip()
+
+def _transaction_items(parsed_data: Any) -> List[Any]:
+    """Unwrap the decoded model output into a list of raw transaction objects."""
+    # Check if the response has a "transactions" key
+    if "transactions" in parsed_data and isinstance(parsed_data["transactions"], list):
+        return parsed_data["transactions"]
+    elif isinstance(parsed_data, list):
+        return parsed_data
+    return [parsed_data]
+
+def _validate_transactions(items: List[Any]) -> List[NlpParsedTransaction]:
+    """Validate raw transaction objects, logging and dropping the invalid ones."""
+    validated_transactions: List[NlpParsedTransaction] = []
+    for parsed_data in items:
+        try:
+            validated_transaction = NlpParsedTransaction(**parsed_data)
+            logger.info(f"Validated NLP result: {validated_transaction}")
+            validated_transactions.append(validated_transaction)
+        except Exception as e:
+            logger.error(f"Validation error for a transaction: {e}", exc_info=True)
+            logger.error(f"Data causing validation error: {parsed_data}")
+    return validated_transactions
+
+async def parse_transaction_nlp(text: str, currency: str = "INR") -> List[NlpParsedTransaction] | None:
+    """
+    Parses text into structured transactions, serving repeated inputs from the
+    parse cache (see services.nlp_cache) and asking Ollama otherwise.
+    Returns None if the LLM call or its output failed.
+    """
+    current_date = date.today().isoformat()
+    if parse_cache is None:
+        return await _generate_transactions(text, currency, current_date)
+
+    cache_key = _cache_key(text, currency, current_date)
+    cached = await parse_cache.get(cache_key)
+    if cached is not None:
+        logger.info("NLP parse served from cache.")
+        return cached
+
+    transactions = await _generate_transactions(text, currency, current_date)
+    if transactions:
+        await parse_cache.set(cache_key, transactions)
+    return transactions
+
+async def _generate_transactions(text: str, currency: str, current_date: str) -> List[NlpParsedTransaction] | None:
+    """Ask the LLM, through the micro-batcher when it is enabled."""
+    if _batcher is None:
+        return await _request_transactions(text, currency, current_date)
+    return await _batcher.submit((text, currency, current_date), group=(currency, current_date))
+
+async def _request_transactions(text: str, currency: str, current_date: str) -> List[NlpParsedTransaction] | None:
+    """
+    Sends text to Ollama for parsing into structured transactions.
+    Handles lists and single transactions, with improved prompt for multiple transaction extraction.
+    Raises OllamaOverloaded when the admission queue is full.
+    """
+    payload = _build_payload(text, currency, current_date)
+
     json_string = "[]"
     try:
         logger.info(f"Sending text to Ollama for parsing. Model: {OLLAMA_MODEL}")
-        async with httpx.AsyncClient(timeout=httpx.Timeout(None)) as client:
-            response = await client.post(f"{OLLAMA_BASE_URL}api/generate", json=payload)
-            logger.debug(f"Ollama raw response status: {response.status_code}")
-            response.raise_for_status()
+        async with ollama.admission.slot():
+            response = await ollama.get_client().post(f"{OLLAMA_BASE_URL}api/generate", json=payload)
+        logger.debug(f"Ollama raw response status: {response.status_code}")
+        response.raise_for_status()
 
-            response_data = response.json()
-            logger.debug(f"Ollama raw response data: {response_data}")
-            json_string = response_data.get("response", "[]")
-
-            if json_string.startswith("```json"):
-                json_string = json_string[7:]
-            if json_string.endswith("```"):
-                json_string = json_string[:-3]
-            json_string = json_string.strip()
-
-            if not json_string:
-                logger.warning("Ollama returned an empty response string.")
-                return []
-
-            logger.debug(f"Cleaned JSON string from Ollama: {json_string}")
-
-            try:
-                parsed_data = json.loads(json_string)
-                # Check if the response has a "transactions" key
-                if "transactions" in parsed_data and isinstance(parsed_data["transactions"], list):
-                    parsed_data_list = parsed_data["transactions"]
-                elif isinstance(parsed_data, list):
-                    parsed_data_list = parsed_data
-                else:
-                    parsed_data_list = [parsed_data]
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to decode JSON response from Ollama: {e}", exc_info=True)
-                logger.error(f"Raw response string causing error: {json_string}")
-                return None
-
-            validated_transactions: List[NlpParsedTransaction] = []
-            for parsed_data in parsed_data_list:
-                try:
-                    validated_transaction = NlpParsedTransaction(**parsed_data)
-                    logger.info(f"Validated NLP result: {validated_transaction}")
-                    validated_transactions.append(validated_transaction)
-                except Exception as e:
-                    logger.error(f"Validation error for a transaction: {e}", exc_info=True)
-                    logger.error(f"Data causing validation error: {parsed_data}")
+        response_data = response.json()
+        logger.debug(f"Ollama raw response data: {response_data}")
+        json_string = _clean_json_string(response_data.get("response", "[]"))
+
+        if not json_string:
+            logger.warning("Ollama returned an empty response string.")
+            return []
 
-            return validated_transactions
+        logger.debug(f"Cleaned JSON string from Ollama: {json_string}")
 
+        try:
+            parsed_data_list = _transaction_items(json.loads(json_string))
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to decode JSON response from Ollama: {e}", exc_info=True)
+            logger.error(f"Raw response string causing error: {json_string}")
+            return None
+
+        return _validate_transactions(parsed_data_list)
+
+    except ollama.OllamaOverloaded:
+        raise
     except httpx.RequestError as e:
         logger.error(f"HTTP request error contacting Ollama at {OLLAMA_BASE_URL}: {e}", exc_info=True)
         return None
@@ -124,3 +197,139 @@ async def parse_transaction_nlp(text: str, currency: str = "INR") -> List[NlpPar
     except Exception as e:
         logger.error(f"An unexpected error occurred: {e}", exc_info=True)
         return None
+
+async def _request_batch(items: List[tuple[str, str, str]]) -> List[List[NlpParsedTransaction] | None]:
+    """
+    Parse several texts (sharing currency and date) with one numbered prompt.
+    Returns one result per text, None where the answer for that text is missing,
+    malformed or holds no valid transaction, so the batcher retries it on its own.
+    Raises OllamaOverloaded when the admission queue is full.
+    """
+    _, currency, current_date = items[0]
+    numbered_inputs = "\n".join(f"{number}. {json.dumps(text, ensure_ascii=False)}" for number, (text, _, _) in enumerate(items, start=1))
+    payload = {
+        "model": OLLAMA_MODEL,
+        "prompt": BATCH_PROMPT_TEMPLATE.format(
+            count=len(items),
+            numbered_inputs=numbered_inputs,
+            currency=currency,
+            current_date=current_date,
+        ),
+        "format": "json",
+        "stream": False
+    }
+    failed: List[List[NlpParsedTransaction] | None] = [None] * len(items)
+    try:
+        logger.info(f"Sending batch of {len(items)} texts to Ollama for parsing. Model: {OLLAMA_MODEL}")
+        async with ollama.admission.slot():
+            response = await ollama.get_client().post(f"{OLLAMA_BASE_URL}api/generate", json=payload)
+        response.raise_for_status()
+        answers = json.loads(_clean_json_string(response.json().get("response", "{}")))
+    except ollama.OllamaOverloaded:
+        raise
+    except Exception as e:
+        logger.error(f"Batched NLP parse failed: {e}", exc_info=True)
+        return failed
+
+    if not isinstance(answers, dict):
+        logger.warning("Batched NLP parse did not return a JSON object keyed by text number.")
+        return failed
+
+    results = []
+    for number in range(1, len(items) + 1):
+        answer = answers.get(str(number))
+        transactions = _validate_transactions(_transaction_items(answer)) if isinstance(answer, (list, dict)) else []
+        # An empty slice may just be the batch not lining up; only a single parse can tell
+        results.append(transactions or None)
+    return results
+
+async def _request_single(item: tuple[str, str, str]) -> List[NlpParsedTransaction] | None:
+    return await _request_transactions(*item)
+
+_batcher = ParseBatcher(
+    run_single=_request_single,
+    run_batch=_request_batch,
+    window_seconds=settings.NLP_BATCH_WINDOW_MS / 1000,
+    max_batch=settings.NLP_BATCH_MAX_SIZE,
+) if settings.NLP_BATCH_WINDOW_MS > 0 and settings.NLP_BATCH_MAX_SIZE > 1 else None
+
+def batcher_stats() -> dict | None:
+    return _batcher.stats() if _batcher else None
+
+class _TransactionObjectScanner:
+    """
+    Finds complete JSON objects in model output that arrives in fragments.
+    An object is reported once its closing brace arrives if it has an "amount"
+    key, so this works for a bare array, a single object or {"transactions": [...]}.
+    """
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._in_string = False
+        self._escaped = False
+        self._starts: List[int] = []
+
+    def feed(self, fragment: str) -> List[dict]:
+        """Add a fragment and return the transaction objects it completed."""
+        self._text += fragment
+        completed = []
+        for pos in range(self._pos, len(self._text)):
+            char = self._text[pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._starts.append(pos)
+            elif char == "}" and self._starts:
+                start = self._starts.pop()
+                try:
+                    candidate = json.loads(self._text[start:pos + 1])
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(candidate, dict) and "amount" in candidate:
+                    completed.append(candidate)
+        self._pos = len(self._text)
+        return completed
+
+async def stream_transaction_nlp(text: str, currency: str = "INR") -> AsyncIterator[NlpParsedTransaction]:
+    """
+    Like parse_transaction_nlp, but yields each transaction as soon as the model has
+    finished writing it, using Ollama's streaming mode. Cached results are yielded at once.
+    Raises OllamaOverloaded when the admission queue is full and httpx errors if Ollama fails.
+    """
+    current_date = date.today().isoformat()
+    cache_key = _cache_key(text, currency, current_date)
+    if parse_cache is not None:
+        cached = await parse_cache.get(cache_key)
+        if cached is not None:
+            logger.info("NLP stream parse served from cache.")
+            for transaction in cached:
+                yield transaction
+            return
+
+    payload = _build_payload(text, currency, current_date, stream=True)
+    scanner = _TransactionObjectScanner()
+    transactions: List[NlpParsedTransaction] = []
+    logger.info(f"Streaming text to Ollama for parsing. Model: {OLLAMA_MODEL}")
+    async with ollama.admission.slot():
+        async with ollama.get_client().stream("POST", f"{OLLAMA_BASE_URL}api/generate", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                for item in scanner.feed(chunk.get("response", "")):
+                    for transaction in _validate_transactions([item]):
+                        transactions.append(transaction)
+                        yield transaction
+                if chunk.get("done"):
+                    break
+
+    if parse_cache is not None and transactions:
+        await parse_cache.set(cache_key, transactions)
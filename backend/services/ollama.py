@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import httpx
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class OllamaOverloaded(Exception):
+    """Raised when too many generations are already running or queued."""
+
+class AdmissionQueue:
+    """
+    Bounded admission control for Ollama generations: at most `max_in_flight`
+    run at once, at most `max_waiting` wait behind them, and anything beyond
+    that is rejected immediately with OllamaOverloaded.
+    """
+    def __init__(self, *, max_in_flight: int, max_waiting: int):
+        self.max_in_flight = max_in_flight
+        self.max_waiting = max_waiting
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    def is_full(self) -> bool:
+        """True when a new caller would be rejected."""
+        return self._semaphore.locked() and self.waiting >= self.max_waiting
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one generation slot for the duration of the block."""
+        if self.is_full():
+            self.rejected += 1
+            raise OllamaOverloaded(
+                f"Ollama is busy ({self.in_flight} running, {self.waiting} queued)."
+            )
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "max_in_flight": self.max_in_flight,
+            "max_waiting": self.max_waiting,
+        }
+
+admission = AdmissionQueue(
+    max_in_flight=settings.OLLAMA_MAX_IN_FLIGHT,
+    max_waiting=settings.OLLAMA_MAX_QUEUE,
+)
+
+_client: httpx.AsyncClient | None = None
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(
+            connect=settings.OLLAMA_CONNECT_TIMEOUT,
+            read=settings.OLLAMA_READ_TIMEOUT,
+            write=settings.OLLAMA_CONNECT_TIMEOUT,
+            pool=settings.OLLAMA_READ_TIMEOUT,
+        ),
+        limits=httpx.Limits(
+            max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OLLAMA_MAX_CONNECTIONS,
+        ),
+    )
+
+async def start_client() -> None:
+    """Create the shared keep-alive client. Called from the app lifespan."""
+    global _client
+    if _client is None:
+        _client = _build_client()
+        logger.info("Ollama HTTP client started.")
+
+async def close_client() -> None:
+    """Close the shared client and its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        logger.info("Ollama HTTP client closed.")
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it if the lifespan hook has not run (e.g. in scripts)."""
+    global _client
+    if _client is None:
+        _client = _build_client()
+    return _client
@@ -0,0 +1,124 @@
+import logging
+import re
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import List
+
+from schemas import NlpParsedTransaction, TransactionType
+
+logger = logging.getLogger(__name__)
+
+# Superset of the keyword rules the LLM prompt uses to infer the type (_EXTRACTION_RULES in
+# services/nlp_parser.py); tests/test_rule_parser.py checks the two agree
+EXPENSE_KEYWORDS = {"spent", "spend", "paid", "pay", "bought", "buy", "purchased", "debited"}
+INCOME_KEYWORDS = {"received", "got", "salary", "earned", "credited"}
+
+CATEGORY_KEYWORDS = {
+    "Groceries": ("groceries", "grocery", "vegetables", "fruits", "supermarket", "milk"),
+    "Dining": ("coffee", "tea", "lunch", "dinner", "breakfast", "restaurant", "cafe", "pizza", "snacks", "food"),
+    "Transport": ("uber", "ola", "taxi", "cab", "bus", "train", "metro", "fuel", "petrol", "diesel"),
+    "Utilities": ("electricity", "water bill", "internet", "wifi", "phone bill", "mobile recharge", "recharge"),
+    "Rent/Mortgage": ("rent", "mortgage"),
+    "Salary": ("salary", "paycheck", "wages"),
+    "Freelance": ("freelance", "freelancing"),
+    "Gift": ("gift",),
+    "Shopping": ("shopping", "clothes", "shoes", "amazon", "flipkart"),
+    "Entertainment": ("movie", "movies", "netflix", "spotify", "concert"),
+    "Travel": ("flight", "hotel", "trip", "vacation"),
+    "Healthcare": ("doctor", "medicine", "medicines", "hospital", "pharmacy"),
+    "Education": ("tuition", "course", "books", "school fees", "college fees"),
+    "Investment": ("investment", "stocks", "shares", "mutual fund", "sip"),
+}
+
+# Categories that only make sense for one direction of money
+INCOME_ONLY_CATEGORIES = {"Salary", "Freelance"}
+EXPENSE_ONLY_CATEGORIES = set(CATEGORY_KEYWORDS) - INCOME_ONLY_CATEGORIES - {"Gift", "Investment"}
+
+# Any other time reference is left to the LLM
+TEMPORAL_WORDS = {
+    "tomorrow", "last", "ago", "week", "month", "year", "monday", "tuesday", "wednesday",
+    "thursday", "friday", "saturday", "sunday", "jan", "january", "feb", "february", "mar",
+    "march", "apr", "april", "may", "jun", "june", "jul", "july", "aug", "august", "sep",
+    "sept", "september", "oct", "october", "nov", "november", "dec", "december",
+}
+
+CLAUSE_SPLIT_PATTERN = re.compile(r"\s*(?:,\s+|;|\n|\band\b|\bthen\b)\s*", re.IGNORECASE)
+AMOUNT_PATTERN = re.compile(r"(?:\b(?:rs\.?|inr)|₹|\$)?\s*(\d{1,3}(?:,\d{2,3})+|\d+)(\.\d{1,2})?(?![\w.])", re.IGNORECASE)
+NUMBER_PATTERN = re.compile(r"\d")
+DESCRIPTION_PATTERN = re.compile(r"\b(?:on|for|at|from)\s+(.+)$", re.IGNORECASE)
+
+stats = {"handled": 0, "fallthrough": 0}
+
+def _match_category(words: List[str]) -> str | None:
+    """Return the single category whose keywords appear in the words, or None if zero or several match."""
+    padded = f" {' '.join(words)} "
+    matches = {
+        category
+        for category, keywords in CATEGORY_KEYWORDS.items()
+        if any(f" {keyword} " in padded for keyword in keywords)
+    }
+    return matches.pop() if len(matches) == 1 else None
+
+def _parse_clause(clause: str, today: date) -> NlpParsedTransaction | None:
+    """Parse one clause such as "spent 200 on groceries", or None if it is not clear-cut."""
+    amounts = AMOUNT_PATTERN.findall(clause)
+    remainder = " ".join(AMOUNT_PATTERN.sub(" ", clause).split())
+    if len(amounts) != 1 or NUMBER_PATTERN.search(remainder):
+        return None
+    whole, fraction = amounts[0]
+    amount = Decimal(whole.replace(",", "") + fraction)
+    if amount <= 0:
+        return None
+
+    words = re.findall(r"[a-z]+", clause.lower())
+    if TEMPORAL_WORDS.intersection(words):
+        return None
+
+    is_expense = bool(EXPENSE_KEYWORDS.intersection(words))
+    is_income = bool(INCOME_KEYWORDS.intersection(words))
+    if is_expense == is_income:
+        return None
+    transaction_type = TransactionType.INCOME if is_income else TransactionType.EXPENSE
+
+    category = _match_category(words)
+    if category is None:
+        return None
+    if category in (INCOME_ONLY_CATEGORIES if is_expense else EXPENSE_ONLY_CATEGORIES):
+        return None
+
+    day = today - timedelta(days=1) if "yesterday" in words else today
+    description_match = DESCRIPTION_PATTERN.search(remainder)
+    description = (description_match.group(1) if description_match else remainder).strip(" .")
+
+    return NlpParsedTransaction(
+        amount=amount,
+        type=transaction_type,
+        category=category,
+        description=description or None,
+        date=datetime.combine(day, time()),
+    )
+
+def parse_transaction_rules(text: str) -> List[NlpParsedTransaction] | None:
+    """
+    Deterministic parser for simple inputs ("spent 200 on groceries, got salary 50000").
+    Every clause must have exactly one amount, an unambiguous INCOME/EXPENSE keyword
+    and a recognizable category; otherwise None is returned and the caller should
+    fall back to the LLM parser.
+    """
+    clauses = [clause for clause in CLAUSE_SPLIT_PATTERN.split(text.strip()) if clause]
+    today = date.today()
+    transactions = []
+    for clause in clauses:
+        transaction = _parse_clause(clause, today)
+        if transaction is None:
+            stats["fallthrough"] += 1
+            return None
+        transactions.append(transaction)
+
+    if not transactions:
+        stats["fallthrough"] += 1
+        return None
+
+    stats["handled"] += 1
+    logger.info(f"Rule parser handled input with {len(transactions)} transaction(s).")
+    return transactions
@@ -0,0 +1,44 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+import crud
+from api.v1 import deps
+from db import models
+
+
+def _client(monkeypatch, *, is_active: bool) -> TestClient:
+    async def get_data_version(db, *, id):
+        return 4
+
+    monkeypatch.setattr(crud.user, "get_data_version", get_data_version)
+    app = FastAPI()
+
+    @app.get("/items/", dependencies=[Depends(deps.check_not_modified)])
+    async def read_items():
+        return []
+
+    async def no_session():
+        yield None
+
+    app.dependency_overrides[deps.get_current_user] = lambda: models.User(id=1, is_active=is_active)
+    app.dependency_overrides[deps.get_read_session] = no_session
+    return TestClient(app)
+
+
+def test_matching_if_none_match_gets_304(monkeypatch):
+    client = _client(monkeypatch, is_active=True)
+    etag = client.get("/items/?limit=5").headers["ETag"]
+    response = client.get("/items/?limit=5", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert client.get("/items/?limit=6", headers={"If-None-Match": etag}).status_code == 200
+
+
+@pytest.mark.parametrize("if_none_match", [None, "*"])
+def test_inactive_user_is_refused_before_the_etag_check(monkeypatch, if_none_match):
+    client = _client(monkeypatch, is_active=False)
+    headers = {"If-None-Match": if_none_match} if if_none_match else {}
+    response = client.get("/items/", headers=headers)
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Inactive user"}
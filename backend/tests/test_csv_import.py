@@ -0,0 +1,55 @@
+import asyncio
+import csv
+from decimal import Decimal
+
+from services import csv_import
+from services.csv_import import _row_to_transaction
+
+
+def test_account_id_column_is_overridden():
+    transaction = _row_to_transaction({"date": "2026-01-05", "amount": "-5.00", "account_id": "99"}, account_id=3)
+    assert transaction.account_id == 3
+
+
+def test_thousands_separators_are_dropped_with_a_type_column():
+    transaction = _row_to_transaction({"date": "2026-01-05", "amount": "1,234.56", "type": "expense"}, account_id=3)
+    assert transaction.amount == Decimal("1234.56")
+    assert transaction.type == "EXPENSE"
+
+
+def test_sign_decides_the_type_without_a_type_column():
+    transaction = _row_to_transaction({"date": "2026-01-05", "amount": "-1,234.56"}, account_id=3)
+    assert transaction.amount == Decimal("1234.56")
+    assert transaction.type == "EXPENSE"
+
+
+def test_type_is_stripped_before_validation():
+    transaction = _row_to_transaction({"date": "2026-01-05", "amount": "5.00", "type": " expense "}, account_id=3)
+    assert transaction.type == "EXPENSE"
+
+
+class _Upload:
+    def __init__(self, data: bytes, chunk_size: int):
+        self.data = data
+        self.chunk_size = chunk_size
+
+    async def read(self, size: int) -> bytes:
+        chunk, self.data = self.data[:self.chunk_size], self.data[self.chunk_size:]
+        return chunk
+
+
+def _records(data: str, chunk_size: int = 7) -> list:
+    async def collect():
+        return [record async for record in csv_import._iter_records(_Upload(data.encode(), chunk_size))]
+    return asyncio.run(collect())
+
+
+def test_records_split_only_at_csv_line_endings():
+    data = 'date,amount,description\r\n2026-01-05,5.00,"page\x0cbreak"\r\n2026-01-06,6.00,"line\u2028sep\nand newline"\n2026-01-07,7.00,plain\x85text\r'
+    rows = [next(csv.reader([record])) for record in _records(data)]
+    assert rows == [
+        ["date", "amount", "description"],
+        ["2026-01-05", "5.00", "page\x0cbreak"],
+        ["2026-01-06", "6.00", "line\u2028sep\nand newline"],
+        ["2026-01-07", "7.00", "plain\x85text"],
+    ]
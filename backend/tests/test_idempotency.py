@@ -0,0 +1,55 @@
+import json
+import time
+
+import pytest
+from fastapi import HTTPException
+
+import crud
+import schemas
+from api.v1.endpoints.transactions import _replay_idempotent_response
+
+
+def _create(**fields) -> schemas.TransactionCreate:
+    return schemas.TransactionCreate(**{"amount": "12.50", "type": "EXPENSE", "account_id": 1, **fields})
+
+
+def test_retry_without_date_replays_stored_response():
+    first = _create(description="Coffee")
+    stored = {
+        "request_hash": crud.idempotency.request_hash("POST", "/transactions/", first),
+        "status_code": 201,
+        "response": {"id": 7, "amount": 12.5},
+    }
+    time.sleep(0.001)
+    # The retry's defaulted `date` differs from the first attempt's
+    retry = _create(description="Coffee")
+    assert retry.date != first.date
+
+    response = _replay_idempotent_response(
+        stored, crud.idempotency.request_hash("POST", "/transactions/", retry)
+    )
+    assert response.status_code == 201
+    assert response.headers["Idempotent-Replayed"] == "true"
+    assert json.loads(response.body) == stored["response"]
+
+
+def test_bulk_retry_without_dates_hashes_the_same():
+    def bulk() -> schemas.TransactionBulkCreate:
+        return schemas.TransactionBulkCreate(transactions=[_create(), _create(amount="3.00")])
+
+    first = crud.idempotency.request_hash("POST", "/transactions/bulk", bulk())
+    time.sleep(0.001)
+    assert crud.idempotency.request_hash("POST", "/transactions/bulk", bulk()) == first
+
+
+def test_different_request_with_same_key_is_rejected():
+    stored = {
+        "request_hash": crud.idempotency.request_hash("POST", "/transactions/", _create()),
+        "status_code": 201,
+        "response": {},
+    }
+    with pytest.raises(HTTPException) as exc_info:
+        _replay_idempotent_response(
+            stored, crud.idempotency.request_hash("POST", "/transactions/", _create(amount="99.00"))
+        )
+    assert exc_info.value.status_code == 422
@@ -0,0 +1,86 @@
+import asyncio
+from decimal import Decimal
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+import crud
+import schemas
+from db.base_class import Base
+from db.models import AccountBalanceSnapshot, User
+
+
+async def _setup(database_url: str):
+    engine = create_async_engine(database_url, poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with sessions() as db:
+        user = User(first_name="Test", email="ledger@example.com", hashed_password="x")
+        db.add(user)
+        await db.commit()
+        account = await crud.account.create_with_owner(
+            db, obj_in=schemas.AccountCreate(name="Cash", type="Cash", balance=Decimal("100.00")), owner_id=user.id
+        )
+    return engine, sessions, user.id, account.id
+
+
+def _transaction(account_id: int, amount: str, transaction_type: str) -> schemas.TransactionCreate:
+    return schemas.TransactionCreate(amount=amount, type=transaction_type, account_id=account_id)
+
+
+def test_rebuild_keeps_the_unexplained_balance_as_an_adjustment(database_url):
+    async def run():
+        engine, sessions, owner_id, account_id = await _setup(database_url)
+        try:
+            async with sessions() as db:
+                for amount, transaction_type in (("40.00", "INCOME"), ("15.50", "EXPENSE"), ("4.50", "EXPENSE")):
+                    await crud.transaction.create_with_owner(
+                        db, obj_in=_transaction(account_id, amount, transaction_type), owner_id=owner_id
+                    )
+                account = await crud.account.get_by_owner(db, owner_id=owner_id, id=account_id)
+                await crud.ledger.rebuild(db, account=account)
+                await db.commit()
+
+                snapshots = (await db.execute(
+                    select(AccountBalanceSnapshot).filter(AccountBalanceSnapshot.account_id == account_id)
+                )).scalars().all()
+                signed_total = Decimal("40.00") - Decimal("15.50") - Decimal("4.50")
+                assert account.balance == Decimal("120.00")
+                assert sum(snapshot.net_change for snapshot in snapshots) == signed_total
+                assert sum(snapshot.adjustment for snapshot in snapshots) == account.balance - signed_total
+                assert (await crud.ledger.reconcile(db, account=account)).in_sync
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+def test_rebuild_blocks_concurrent_transaction_writes(database_url):
+    async def run():
+        engine, sessions, owner_id, account_id = await _setup(database_url)
+        try:
+            async with sessions() as rebuild_db, sessions() as writer_db:
+                account = await crud.account.get_by_owner(rebuild_db, owner_id=owner_id, id=account_id)
+                await crud.ledger.rebuild(rebuild_db, account=account)
+
+                write = asyncio.create_task(crud.transaction.create_with_owner(
+                    writer_db, obj_in=_transaction(account_id, "25.00", "EXPENSE"), owner_id=owner_id
+                ))
+                await asyncio.sleep(0.5)
+                assert not write.done()
+                await rebuild_db.commit()
+                await write
+
+            async with sessions() as db:
+                account = await crud.account.get_by_owner(db, owner_id=owner_id, id=account_id)
+                reconciliation = await crud.ledger.reconcile(db, account=account)
+                assert account.balance == Decimal("75.00")
+                assert reconciliation.in_sync
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
@@ -0,0 +1,33 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from core.config import settings
+
+
+@pytest.fixture
+def client() -> TestClient:
+    # Not used as a context manager, so the lifespan (database checks) never runs
+    return TestClient(main.app)
+
+
+def test_metrics_disabled_without_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    assert client.get("/metrics").status_code == 404
+    assert client.get("/metrics", headers={"Authorization": "Bearer "}).status_code == 404
+
+
+@pytest.mark.parametrize("authorization", [None, "Bearer wrong", "metrics-token"])
+def test_metrics_rejects_missing_or_wrong_token(client, monkeypatch, authorization):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "metrics-token")
+    headers = {"Authorization": authorization} if authorization else {}
+    response = client.get("/metrics", headers=headers)
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+
+
+def test_metrics_with_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "metrics-token")
+    response = client.get("/metrics", headers={"Authorization": "Bearer metrics-token"})
+    assert response.status_code == 200
+    assert "db_pool" in response.json()
@@ -0,0 +1,27 @@
+from decimal import Decimal
+
+import pytest
+from pydantic import ValidationError
+
+import schemas
+
+
+def _create(amount) -> schemas.TransactionCreate:
+    return schemas.TransactionCreate(amount=amount, type="EXPENSE", account_id=1)
+
+
+@pytest.mark.parametrize("amount, expected", [("0.005", Decimal("0.01")), (12.345, Decimal("12.35")), ("999999999999.99", Decimal("999999999999.99"))])
+def test_amounts_are_rounded_to_minor_units(amount, expected):
+    assert _create(amount).amount == expected
+
+
+@pytest.mark.parametrize("amount", ["0.004", "999999999999.995", "1e30", "NaN", "abc"])
+def test_bounds_apply_to_the_rounded_amount(amount):
+    with pytest.raises(ValidationError):
+        _create(amount)
+
+
+def test_account_balance_bounds_apply_to_the_rounded_amount():
+    with pytest.raises(ValidationError):
+        schemas.AccountCreate(name="Cash", type="Cash", balance="-999999999999.995")
+    assert schemas.AccountCreate(name="Cash", type="Cash", balance="-0.001").balance == Decimal("0.00")
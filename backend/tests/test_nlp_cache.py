@@ -0,0 +1,25 @@
+import asyncio
+
+import pytest
+
+from services.nlp_cache import MemoryCacheBackend, ParseCache, SQLiteCacheBackend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryCacheBackend(max_entries=10, ttl_seconds=60)
+    return SQLiteCacheBackend(path=str(tmp_path / "cache.sqlite3"), max_entries=10, ttl_seconds=60)
+
+
+@pytest.mark.parametrize("raw", ["{not json", '[{"amount": "lots"}]', '{"old": "format"}'])
+def test_unreadable_entries_are_evicted_misses(backend, raw):
+    cache = ParseCache(backend)
+
+    async def run():
+        await backend.set("key", raw)
+        assert await cache.get("key") is None
+        assert await backend.get("key") is None
+
+    asyncio.run(run())
+    assert (cache.hits, cache.misses) == (0, 1)
@@ -0,0 +1,35 @@
+import asyncio
+import json
+
+import httpx
+
+from services import nlp_parser, ollama
+
+
+class _FakeClient:
+    def __init__(self, answer: dict):
+        self.answer = answer
+
+    async def post(self, url, **kwargs):
+        return httpx.Response(
+            200, json={"response": json.dumps(self.answer)}, request=httpx.Request("POST", url)
+        )
+
+
+def _batch(monkeypatch, answer: dict, count: int):
+    monkeypatch.setattr(ollama, "get_client", lambda: _FakeClient(answer))
+    items = [(f"text {number}", "INR", "2026-01-05") for number in range(1, count + 1)]
+    return asyncio.run(nlp_parser._request_batch(items))
+
+
+def test_empty_or_invalid_slices_are_retried_singly(monkeypatch):
+    valid = {"amount": 250, "type": "EXPENSE", "category": "Groceries", "date": "2026-01-05"}
+    results = _batch(monkeypatch, {"1": [valid], "2": [], "3": {"note": "nothing here"}}, count=4)
+    assert len(results[0]) == 1
+    assert results[1:] == [None, None, None]
+
+
+def test_prompts_share_the_transaction_fields_and_rules():
+    for template in (nlp_parser.PROMPT_TEMPLATE, nlp_parser.BATCH_PROMPT_TEMPLATE):
+        assert nlp_parser._TRANSACTION_FIELDS in template
+        assert nlp_parser._EXTRACTION_RULES in template
@@ -0,0 +1,27 @@
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.v1 import deps
+from api.v1.endpoints import transactions
+from core.config import settings
+from db import models
+from services import nlp_parser
+
+
+def test_stream_without_transactions_ends_with_an_error_line(monkeypatch):
+    async def stream_nothing(text, currency="INR"):
+        return
+        yield
+
+    monkeypatch.setattr(settings, "NLP_RULE_PARSER_ENABLED", False)
+    monkeypatch.setattr(nlp_parser, "stream_transaction_nlp", stream_nothing)
+    app = FastAPI()
+    app.include_router(transactions.router, prefix="/transactions")
+    app.dependency_overrides[deps.get_current_active_user] = lambda: models.User(id=1, email="a@example.com")
+
+    response = TestClient(app).post("/transactions/parse/stream", json={"text": "hello there"})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert response.status_code == 200
+    assert lines == [{"error": "Could not parse transaction details from the provided text."}]
@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from core import security
+from db import base
+
+
+def test_read_pin_token_round_trip():
+    token = security.create_read_pin_token(7, timedelta(seconds=5))
+    assert security.read_pin_user_id(token) == 7
+
+
+def test_expired_or_foreign_tokens_are_not_read_pins():
+    assert security.read_pin_user_id(security.create_read_pin_token(7, timedelta(seconds=-1))) is None
+    assert security.read_pin_user_id(security.create_access_token("a@example.com", user_id=7)) is None
+    assert security.read_pin_user_id("not-a-token") is None
+
+
+def test_pinned_reads_use_the_primary(monkeypatch):
+    replica = object()
+    monkeypatch.setattr(base, "ReplicaSessionFactories", [replica])
+    monkeypatch.setattr(base, "_replica_rotation", iter([replica] * 2))
+    assert base.read_session_factory(user_id=1) is replica
+    assert base.read_session_factory(user_id=1, pinned=True) is base.AsyncSessionFactory
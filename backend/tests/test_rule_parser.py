@@ -0,0 +1,73 @@
+import re
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from schemas import KNOWN_CATEGORIES, TransactionType
+from services import nlp_parser, rule_parser
+
+
+def test_keyword_categories_are_known_categories():
+    # The category filter matches known categories exactly, so the rule parser must not invent new ones
+    assert set(rule_parser.CATEGORY_KEYWORDS) <= set(KNOWN_CATEGORIES)
+
+
+def test_type_keywords_agree_with_prompt():
+    # The prompt lists example keywords per type; the rule parser must classify each of them the same way
+    examples = {
+        transaction_type: set(re.findall(r'"(\w+)"', keywords))
+        for keywords, transaction_type in re.findall(r'((?:"\w+",?\s*)+)->\s*(INCOME|EXPENSE)', nlp_parser._EXTRACTION_RULES)
+    }
+    assert examples["EXPENSE"] and examples["INCOME"]
+    assert examples["EXPENSE"] <= rule_parser.EXPENSE_KEYWORDS
+    assert examples["INCOME"] <= rule_parser.INCOME_KEYWORDS
+    assert not rule_parser.EXPENSE_KEYWORDS & rule_parser.INCOME_KEYWORDS
+
+
+def test_single_clause():
+    [transaction] = rule_parser.parse_transaction_rules("spent rs. 1,200 on groceries")
+    assert transaction.amount == Decimal("1200")
+    assert transaction.type == TransactionType.EXPENSE
+    assert transaction.category == "Groceries"
+    assert transaction.description == "groceries"
+    assert transaction.date == datetime.combine(date.today(), time())
+
+
+def test_yesterday():
+    [transaction] = rule_parser.parse_transaction_rules("paid 450.50 for lunch yesterday")
+    assert transaction.amount == Decimal("450.50")
+    assert transaction.category == "Dining"
+    assert transaction.date == datetime.combine(date.today() - timedelta(days=1), time())
+
+
+def test_multiple_clauses():
+    transactions = rule_parser.parse_transaction_rules("spent 200 on groceries, got salary 50000 and paid ₹300 for uber")
+    assert [(t.amount, t.type, t.category) for t in transactions] == [
+        (Decimal("200"), TransactionType.EXPENSE, "Groceries"),
+        (Decimal("50000"), TransactionType.INCOME, "Salary"),
+        (Decimal("300"), TransactionType.EXPENSE, "Transport"),
+    ]
+
+
+def test_ambiguous_input_falls_back():
+    for text in (
+        "spent 200 on groceries on 5 march",  # explicit date
+        "spent 200 on groceries last week",  # other time references
+        "groceries 200",  # no type keyword
+        "spent 200 on stuff",  # no category
+        "spent 200 on coffee and groceries",  # several categories
+        "got 200 back and spent it on groceries",  # clause without an amount
+        "spent 200 on groceries for 3 people",  # several numbers
+        "paid salary 500",  # expense in an income-only category
+        "",
+    ):
+        assert rule_parser.parse_transaction_rules(text) is None, text
+
+
+def _without_amounts(text):
+    return rule_parser.AMOUNT_PATTERN.sub(" ", text).split()
+
+
+def test_currency_prefix_needs_word_boundary():
+    assert _without_amounts("hours 200") == ["hours"]
+    assert _without_amounts("drs 50") == ["drs"]
+    assert _without_amounts("rs 200 and inr 5 and ₹7 and $3.50") == ["and", "and", "and"]
@@ -0,0 +1,19 @@
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+import crud
+from db.models import Transaction
+
+
+def _where_sql(**filters) -> str:
+    query = crud.transaction._apply_filters(select(Transaction), owner_id=1, **filters)
+    return str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_known_category_matches_regardless_of_case_and_spaces():
+    sql = _where_sql(category=" groceries ")
+    assert "lower(btrim(transactions.category)) = 'groceries'" in sql
+
+
+def test_other_categories_match_partially():
+    assert "ILIKE '%%Coffee%%'" in _where_sql(category="Coffee")
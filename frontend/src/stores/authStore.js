@@ -13,6 +13,25 @@ export const apiClient = axios.create({
   },
 })
 
+// Token from the last write's response. Sending it back keeps our reads on the
+// primary database until replicas have caught up; the server checks its expiry.
+let readYourWritesToken = null
+
+apiClient.interceptors.request.use((config) => {
+  if (readYourWritesToken) {
+    config.headers['X-Read-Your-Writes'] = readYourWritesToken
+  }
+  return config
+})
+
+apiClient.interceptors.response.use((response) => {
+  const token = response.headers['x-read-your-writes']
+  if (token) {
+    readYourWritesToken = token
+  }
+  return response
+})
+
 export const useAuthStore = defineStore('auth', () => {
   const accessToken = ref(localStorage.getItem('accessToken') || null)
   const refreshToken = ref(localStorage.getItem('refreshToken') || null)
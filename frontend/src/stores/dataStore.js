@@ -90,16 +90,23 @@ export const useDataStore = defineStore('data', () => {
     const startDate = dayjs.utc().subtract(6, 'day').startOf('day').format('YYYY-MM-DD')
 
     try {
-      const response = await apiClient.get('/transactions/', {
-        params: { start_date: startDate, end_date: endDate, limit: 1000 }, // <-- Uncommented this line
+      const response = await apiClient.get('/transactions/summary', {
+        params: { start_date: startDate, end_date: endDate, granularity: 'day' },
       })
-      console.log('API Response for /transactions/ (chart period):', response)
+      console.log('API Response for /transactions/summary (chart period):', response)
       if (Array.isArray(response.data)) {
-        chartTransactions.value = response.data
+        // Daily buckets are shaped like transactions so the charts can keep summing them
+        chartTransactions.value = response.data.map((bucket, index) => ({
+          id: index,
+          date: bucket.period,
+          type: bucket.type,
+          category: bucket.category,
+          amount: bucket.total,
+        }))
         console.log('Chart transactions state updated:', chartTransactions.value)
       } else {
         console.warn(
-          '/transactions/ endpoint did not return an array for chart tx. Data:',
+          '/transactions/summary endpoint did not return an array for chart data. Data:',
           response.data,
         )
         error.value = 'Received invalid data format for chart transactions.'